@@ -5,6 +5,17 @@ import matplotlib.patches as patches
 import matplotlib.animation as animation
 import json
 import time
+import argparse
+import base64
+import hashlib
+import mmap
+import os
+import socket
+import struct
+import sys
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
 # =====================================================================
 # PARTE 1: ESTRUTURA DA SIMULAÇÃO (NÃO MODIFICAR)
@@ -554,32 +565,528 @@ class Simulador:
 # Deve modificar os parâmetros e a lógica para melhorar o desempenho.
 # =====================================================================
 
+class SensoresIncrementais:
+    """Versão incremental de Robo.get_sensores para passos consecutivos.
+
+    Produz exatamente os mesmos valores de get_sensores, mas evita varrer
+    recursos e obstáculos a cada passo: guarda o mais próximo de cada lista e
+    a folga até o segundo mais próximo. Como cada distância muda no máximo o
+    deslocamento do robô (desigualdade triangular), o mais próximo só pode
+    mudar quando o deslocamento acumulado desde a última varredura passa de
+    metade da folga. Os recursos são reavaliados quando robo.recursos_coletados
+    muda (coleta) e em reset(), que deve ser chamado junto com Ambiente.reset.
+    """
+
+    def __init__(self, robo, ambiente):
+        self.robo = robo
+        self.ambiente = ambiente
+        # Centros dos obstáculos são fixos durante a simulação
+        self.centros_obstaculos = [
+            (float(o['x'] + o['largura'] / 2), float(o['y'] + o['altura'] / 2))
+            for o in ambiente.obstaculos
+        ]
+        self.reset()
+
+    def reset(self):
+        # Força varredura completa na próxima leitura
+        self.coletados_vistos = None  # robo.recursos_coletados na última leitura
+        self.posicao_recursos = None
+        self.posicao_obstaculos = None
+        self.recurso_proximo = None
+        self.folga_recursos = 0.0
+        self.deslocamento_recursos = 0.0
+        self.obstaculo_proximo = None
+        self.folga_obstaculos = 0.0
+        self.deslocamento_obstaculos = 0.0
+        self.recurso_angulo = None
+
+    @staticmethod
+    def _normalizar_angulo(angulo):
+        # Mesmo laço de get_sensores para garantir valores idênticos
+        while angulo > np.pi:
+            angulo -= 2 * np.pi
+        while angulo < -np.pi:
+            angulo += 2 * np.pi
+        return angulo
+
+    @staticmethod
+    def _varrer(x, y, pontos):
+        # Retorna (indice do mais próximo, distância, folga até o segundo)
+        melhor, segundo, indice = float('inf'), float('inf'), None
+        for i, (px, py) in pontos:
+            dist = np.hypot(float(x - px), float(y - py))
+            if dist < melhor:
+                melhor, segundo, indice = dist, melhor, i
+            elif dist < segundo:
+                segundo = dist
+        return indice, melhor, segundo - melhor
+
+    def _atualizar_recursos(self, x, y):
+        recursos = self.ambiente.recursos
+        if self.coletados_vistos != self.robo.recursos_coletados:
+            # Recurso coletado ou leitor reiniciado: o primeiro não coletado
+            # (usado pelo ângulo) e o mais próximo podem ter mudado
+            self.coletados_vistos = self.robo.recursos_coletados
+            self.recurso_angulo = next(
+                (i for i, r in enumerate(recursos) if not r['coletado']), None)
+            self.posicao_recursos = None
+
+        if self.posicao_recursos is not None:
+            px, py = self.posicao_recursos
+            self.deslocamento_recursos += np.hypot(float(x - px), float(y - py))
+
+        if self.posicao_recursos is None or 2 * self.deslocamento_recursos + 1e-9 >= self.folga_recursos:
+            pontos = [(i, (r['x'], r['y'])) for i, r in enumerate(recursos) if not r['coletado']]
+            self.recurso_proximo, dist, self.folga_recursos = self._varrer(x, y, pontos)
+            self.deslocamento_recursos = 0.0
+        elif self.recurso_proximo is None:
+            dist = float('inf')
+        else:
+            recurso = recursos[self.recurso_proximo]
+            dist = np.hypot(float(x - recurso['x']), float(y - recurso['y']))
+        self.posicao_recursos = (x, y)
+        return dist
+
+    def _atualizar_obstaculos(self, x, y):
+        if self.posicao_obstaculos is not None:
+            px, py = self.posicao_obstaculos
+            self.deslocamento_obstaculos += np.hypot(float(x - px), float(y - py))
+
+        if self.posicao_obstaculos is None or 2 * self.deslocamento_obstaculos + 1e-9 >= self.folga_obstaculos:
+            self.obstaculo_proximo, dist, self.folga_obstaculos = self._varrer(
+                x, y, enumerate(self.centros_obstaculos))
+            self.deslocamento_obstaculos = 0.0
+        elif self.obstaculo_proximo is None:
+            dist = float('inf')
+        else:
+            cx, cy = self.centros_obstaculos[self.obstaculo_proximo]
+            dist = np.hypot(float(x - cx), float(y - cy))
+        self.posicao_obstaculos = (x, y)
+        return dist
+
+    def ler(self):
+        robo = self.robo
+        ambiente = self.ambiente
+        x, y = robo.x, robo.y
+
+        dist_recurso = self._atualizar_recursos(x, y)
+        dist_obstaculo = self._atualizar_obstaculos(x, y)
+
+        dist_meta = np.hypot(float(x - ambiente.meta['x']), float(y - ambiente.meta['y']))
+
+        # Assim como em get_sensores, o ângulo é para o primeiro recurso
+        # não coletado da lista (não necessariamente o mais próximo)
+        angulo_recurso = 0
+        if self.recurso_angulo is not None:
+            recurso = ambiente.recursos[self.recurso_angulo]
+            angulo = np.arctan2(float(recurso['y'] - y), float(recurso['x'] - x))
+            angulo_recurso = self._normalizar_angulo(angulo - robo.angulo)
+
+        angulo_meta = np.arctan2(float(ambiente.meta['y'] - y), float(ambiente.meta['x'] - x)) - robo.angulo
+        angulo_meta = self._normalizar_angulo(angulo_meta)
+
+        return {
+            'dist_recurso': dist_recurso,
+            'dist_obstaculo': dist_obstaculo,
+            'dist_meta': dist_meta,
+            'angulo_recurso': angulo_recurso,
+            'angulo_meta': angulo_meta,
+            'energia': robo.energia,
+            'velocidade': robo.velocidade,
+            'meta_atingida': robo.meta_atingida
+        }
+
+# Sensores normalizados da mesma forma que em IndividuoPG.avaliar_no
+SENSORES_DISTANCIA = ['dist_recurso', 'dist_obstaculo', 'dist_meta']
+SENSORES_ANGULO = ['angulo_recurso', 'angulo_meta']
+
+# Escala dos sensores contínuos para o CacheSemantico aproximado: o passo se
+# aplica ao valor dividido pela escala (a normalização de avaliar_no para
+# distâncias e ângulos). Contagens e bools não aparecem aqui e nunca são
+# quantizados.
+ESCALA_SENSORES = dict([(nome, 1000) for nome in SENSORES_DISTANCIA] +
+                       [(nome, np.pi) for nome in SENSORES_ANGULO] +
+                       [('energia', 100), ('velocidade', 5)])
+
+OPERADORES_UNARIOS = ['abs', 'sin', 'cos']
+OPERADORES_SENSOR = ['if_recurso_proximo', 'if_todos_coletados', 'if_energia_baixa',
+                     'if_meta_proxima', 'ir_para_meta']
+
+def _dividir(esquerda, direita):
+    return esquerda / direita if direita != 0 else 0
+
+def _dividir_vetor(esquerda, direita):
+    return np.where(direita != 0, esquerda / np.where(direita != 0, direita, 1), 0)
+
+def _min_vetor(a, b):
+    # Igual a min(a, b) do Python elemento a elemento (devolve a se b < a falha)
+    return np.where(b < a, b, a)
+
+def _max_vetor(a, b):
+    return np.where(b > a, b, a)
+
+# Sensores lidos diretamente pelos operadores (além das folhas)
+DEPENDENCIAS_OPERADOR = {
+    'prioridade': ('recursos_coletados', 'total_recursos'),
+    'if_todos_coletados': ('recursos_coletados', 'total_recursos'),
+    'ir_para_meta': ('recursos_coletados', 'total_recursos', 'angulo_meta'),
+    'if_recurso_proximo': ('dist_recurso',),
+    'if_energia_baixa': ('energia',),
+    'if_meta_proxima': ('dist_meta',),
+}
+
+def filhos_usados(no):
+    # Apenas os filhos que avaliar_no realmente usa para o operador do nó
+    if no['tipo'] == 'folha':
+        return ()
+    op = no.get('operador')
+    if op == 'if_then_else':
+        return ('condicao', 'entao', 'senao')
+    if op in OPERADORES_UNARIOS:
+        return ('esquerda',)
+    if op in OPERADORES_SENSOR:
+        return ()
+    return ('esquerda', 'direita')
+
+def rotulo_no(no):
+    # Identifica o nó sem os filhos; None representa um filho ausente
+    if no is None:
+        return ('nada',)
+    if no['tipo'] == 'folha':
+        if 'valor' in no:
+            return ('valor', type(no['valor']).__name__, repr(no['valor']))
+        elif 'variavel' in no:
+            return ('variavel', no['variavel'])
+        return ('folha',)
+    return ('operador', no.get('operador'))
+
+def dependencias_rotulo(rotulo):
+    if rotulo[0] == 'variavel':
+        return frozenset([rotulo[1]])
+    if rotulo[0] == 'operador':
+        return frozenset(DEPENDENCIAS_OPERADOR.get(rotulo[1], ()))
+    return frozenset()
+
+def hash_rotulo(rotulo, hashes_filhos):
+    return hashlib.blake2b(repr((rotulo,) + tuple(hashes_filhos)).encode(), digest_size=16).digest()
+
+def tamanho_arvore(no):
+    if no is None:
+        return 0
+    return 1 + sum(tamanho_arvore(no.get(campo)) for campo in filhos_usados(no))
+
+def profundidade_arvore(no):
+    if no is None or no['tipo'] == 'folha':
+        return 0
+    return 1 + max([profundidade_arvore(no.get(campo)) for campo in filhos_usados(no)], default=0)
+
+def hash_subarvore(no):
+    """Hash estrutural da subárvore, igual para subárvores equivalentes"""
+    filhos = filhos_usados(no) if no is not None else ()
+    return hash_rotulo(rotulo_no(no), [hash_subarvore(no.get(campo)) for campo in filhos])
+
+def dependencias_subarvore(no):
+    """Conjunto de sensores lidos pela subárvore"""
+    filhos = filhos_usados(no) if no is not None else ()
+    return dependencias_rotulo(rotulo_no(no)).union(
+        *[dependencias_subarvore(no.get(campo)) for campo in filhos])
+
+INFO_NADA = (None, hash_rotulo(('nada',), ()), (), 0)
+
+SEM_VALOR = object()
+
+class CacheSemantico:
+    """Memória LRU de saídas de subárvores.
+
+    A chave é (hash estrutural da subárvore, valores quantizados dos sensores
+    que ela lê). Com passo=None a chave usa os valores exatos e o resultado é
+    idêntico ao da avaliação normal; com passo > 0 sensores próximos
+    compartilham a mesma entrada (aproximação). O passo é relativo à escala
+    de cada sensor em ESCALA_SENSORES (passo=0.01: 10 unidades de distância,
+    0.01π de ângulo); sensores discretos usam sempre o valor exato. Subárvores com menos de
+    tamanho_minimo nós não são memorizadas, pois avaliá-las custa menos que
+    a consulta.
+    """
+
+    def __init__(self, capacidade=100000, passo=None, tamanho_minimo=5):
+        self.capacidade = capacidade
+        self.passo = passo
+        self.tamanho_minimo = tamanho_minimo
+        self.entradas = OrderedDict()
+        # id(no) -> (no, hash, dependências, tamanho); guarda referência aos nós,
+        # por isso ProgramacaoGenetica chama esquecer_nos a cada geração
+        self.info_nos = {}
+        self.consultas = 0
+        self.acertos = 0
+        self.remocoes = 0
+
+    def __len__(self):
+        return len(self.entradas)
+
+    @property
+    def taxa_acerto(self):
+        return self.acertos / self.consultas if self.consultas else 0.0
+
+    def estatisticas(self):
+        return {
+            'consultas': self.consultas,
+            'acertos': self.acertos,
+            'taxa_acerto': self.taxa_acerto,
+            'remocoes': self.remocoes,
+            'entradas': len(self.entradas)
+        }
+
+    def zerar_estatisticas(self):
+        self.consultas = 0
+        self.acertos = 0
+        self.remocoes = 0
+
+    def limpar(self):
+        self.entradas.clear()
+        self.info_nos.clear()
+        self.zerar_estatisticas()
+
+    def esquecer_nos(self):
+        # avaliar_no identifica os nós pela identidade; chamar após alterar
+        # árvores no lugar ou para liberar árvores que não serão mais usadas
+        self.info_nos.clear()
+
+    def quantizar(self, nome, valor):
+        escala = ESCALA_SENSORES.get(nome)
+        if self.passo is None or escala is None or valor is None or isinstance(valor, bool):
+            return valor
+        if valor != valor or valor in (float('inf'), float('-inf')):
+            return valor
+        return round(valor / escala / self.passo)
+
+    def chave(self, hash_no, dependencias, sensores):
+        return (hash_no, tuple(self.quantizar(nome, sensores.get(nome)) for nome in dependencias))
+
+    def _info(self, no):
+        info = self.info_nos.get(id(no))
+        if info is None:
+            infos = [self._info(no[campo]) if no.get(campo) is not None else INFO_NADA
+                     for campo in filhos_usados(no)]
+            rotulo = rotulo_no(no)
+            dependencias = dependencias_rotulo(rotulo).union(*[i[2] for i in infos])
+            info = (no, hash_rotulo(rotulo, [i[1] for i in infos]),
+                    tuple(sorted(dependencias)), 1 + sum(i[3] for i in infos))
+            self.info_nos[id(no)] = info
+        return info
+
+    def chave_no(self, no, sensores):
+        # None quando a subárvore é pequena demais para valer a consulta
+        _, hash_no, dependencias, tamanho = self._info(no)
+        if tamanho < self.tamanho_minimo:
+            return None
+        return self.chave(hash_no, dependencias, sensores)
+
+    def buscar(self, chave):
+        self.consultas += 1
+        valor = self.entradas.get(chave, SEM_VALOR)
+        if valor is not SEM_VALOR:
+            self.acertos += 1
+            self.entradas.move_to_end(chave)
+        return valor
+
+    def guardar(self, chave, valor):
+        self.entradas[chave] = valor
+        self.entradas.move_to_end(chave)
+        if len(self.entradas) > self.capacidade:
+            self.entradas.popitem(last=False)
+            self.remocoes += 1
+
+class AvaliadorCompilado:
+    """Avalia as duas árvores de um indivíduo em uma única passada.
+
+    As árvores são convertidas em um grafo com hash-consing: subárvores
+    idênticas (dentro de uma árvore ou entre aceleração e rotação) viram um
+    único nó. O grafo é transformado em uma função Python que normaliza os
+    sensores uma vez e calcula cada nó único uma vez por passo, devolvendo
+    (aceleracao, rotacao) com os mesmos valores de IndividuoPG.avaliar.
+    avaliar_lote usa uma versão vetorizada da mesma função (np.where no
+    lugar dos condicionais) para avaliar vários vetores de sensores de uma
+    vez. Os resultados coincidem com os da versão escalar a menos de ~1e-3:
+    na escalar, np.sin/np.cos de um sensor bool (meta_atingida) são
+    calculados em float16.
+    """
+
+    def __init__(self, arvore_aceleracao, arvore_rotacao):
+        self.arvores = (arvore_aceleracao, arvore_rotacao)
+        self.nos = []  # (chave, expressão, expressão vetorizada) em ordem topológica
+        self.indices = {}  # chave estrutural -> índice do nó
+        self.usa_todos_coletados = False
+        raiz_aceleracao = self._internar(arvore_aceleracao)
+        raiz_rotacao = self._internar(arvore_rotacao)
+        self.raizes = (raiz_aceleracao, raiz_rotacao)
+        self.total_nos = tamanho_arvore(arvore_aceleracao) + tamanho_arvore(arvore_rotacao)
+        self.funcao = self._gerar_funcao()
+        self.funcao_vetorizada = None  # Gerada no primeiro avaliar_lote
+        # Chave do par de árvores para o CacheSemantico
+        self.hash_par = hash_rotulo(('par',), [hash_subarvore(arvore_aceleracao),
+                                               hash_subarvore(arvore_rotacao)])
+        self.dependencias = tuple(sorted(dependencias_subarvore(arvore_aceleracao) |
+                                         dependencias_subarvore(arvore_rotacao)))
+
+    def __call__(self, sensores, cache=None):
+        if cache is None:
+            return self.funcao(sensores)
+        chave = cache.chave(self.hash_par, self.dependencias, sensores)
+        saidas = cache.buscar(chave)
+        if saidas is SEM_VALOR:
+            saidas = self.funcao(sensores)
+            cache.guardar(chave, saidas)
+        return saidas
+
+    def avaliar_lote(self, sensores, n):
+        """Avalia n vetores de sensores de uma vez; sensores é um dicionário
+        de arrays de floats (ver vetorizar_sondas). Retorna dois arrays."""
+        if self.funcao_vetorizada is None:
+            self.funcao_vetorizada = self._gerar_funcao(vetorizada=True)
+        with np.errstate(all='ignore'):
+            aceleracao, rotacao = self.funcao_vetorizada(sensores)
+            return (np.broadcast_to(np.asarray(aceleracao, dtype=float), (n,)),
+                    np.broadcast_to(np.asarray(rotacao, dtype=float), (n,)))
+
+    @property
+    def nos_unicos(self):
+        return len(self.nos)
+
+    def _novo_no(self, chave, expressao, vetorizada=None):
+        if chave not in self.indices:
+            self.indices[chave] = len(self.nos)
+            self.nos.append((chave, expressao, vetorizada if vetorizada is not None else expressao))
+        return self.indices[chave]
+
+    def _internar(self, no):
+        # Retorna o nome da variável local que guarda o valor do nó
+        if no is None:
+            return '0'
+
+        if no['tipo'] == 'folha':
+            if 'valor' in no:
+                valor = no['valor']
+                chave = ('valor', type(valor).__name__, repr(valor))
+                return 'v%d' % self._novo_no(chave, repr(valor))
+            elif 'variavel' in no:
+                variavel = no['variavel']
+                if variavel in SENSORES_DISTANCIA:
+                    expressao = 'min(s.get(%r, 0) / 1000, 1.0)' % variavel
+                    vetorizada = '_min(s.get(%r, 0) / 1000, 1.0)' % variavel
+                elif variavel in SENSORES_ANGULO:
+                    expressao = vetorizada = 's.get(%r, 0) / np.pi' % variavel
+                else:
+                    expressao = vetorizada = 's.get(%r, 0)' % variavel
+                return 'v%d' % self._novo_no(('variavel', variavel), expressao, vetorizada)
+            return '0'
+
+        op = no.get('operador')
+        filhos = [self._internar(no.get(campo)) for campo in filhos_usados(no)]
+        chave = (op,) + tuple(filhos)
+
+        # Na versão vetorizada, _min/_max reproduzem min/max do Python
+        # (inclusive com nan) e np.where substitui os condicionais
+        vetorizada = None
+        if op == 'abs':
+            expressao = 'abs(%s)' % filhos[0]
+            vetorizada = 'np.abs(%s)' % filhos[0]
+        elif op in ('sin', 'cos'):
+            expressao = 'np.%s(min(max(%s, -np.pi), np.pi))' % (op, filhos[0])
+            vetorizada = 'np.%s(_min(_max(%s, -np.pi), np.pi))' % (op, filhos[0])
+        elif op == 'media':
+            expressao = '(%s + %s) / 2' % tuple(filhos)
+        elif op == 'prioridade':
+            self.usa_todos_coletados = True
+            expressao = '%s * 2 if todos_coletados else %s' % (filhos[1], filhos[0])
+            vetorizada = 'np.where(todos_coletados, %s * 2, %s)' % (filhos[1], filhos[0])
+        elif op == 'if_then_else':
+            expressao = '%s if %s > 0 else %s' % (filhos[1], filhos[0], filhos[2])
+            vetorizada = 'np.where(%s > 0, %s, %s)' % (filhos[0], filhos[1], filhos[2])
+        elif op == 'if_recurso_proximo':
+            expressao = "1 if s.get('dist_recurso', float('inf')) < 200 else -1"
+            vetorizada = "np.where(s.get('dist_recurso', np.inf) < 200, 1, -1)"
+        elif op == 'if_todos_coletados':
+            self.usa_todos_coletados = True
+            expressao = '1 if todos_coletados else -1'
+            vetorizada = 'np.where(todos_coletados, 1, -1)'
+        elif op == 'if_energia_baixa':
+            expressao = "1 if s.get('energia', 100) < 30 else -1"
+            vetorizada = "np.where(s.get('energia', 100) < 30, 1, -1)"
+        elif op == 'if_meta_proxima':
+            expressao = "1 if s.get('dist_meta', float('inf')) < 300 else -1"
+            vetorizada = "np.where(s.get('dist_meta', np.inf) < 300, 1, -1)"
+        elif op == 'ir_para_meta':
+            self.usa_todos_coletados = True
+            expressao = "s.get('angulo_meta', 0) if todos_coletados else 0"
+            vetorizada = "np.where(todos_coletados, s.get('angulo_meta', 0), 0)"
+        else:
+            esquerda, direita = filhos
+            limitar, limitar_vetor = 'min(max(%s, -1000), 1000)', '_min(_max(%s, -1000), 1000)'
+            esquerda_vetor, direita_vetor = limitar_vetor % esquerda, limitar_vetor % direita
+            esquerda, direita = limitar % esquerda, limitar % direita
+            if op in ('+', '-', '*'):
+                expressao = '%s %s %s' % (esquerda, op, direita)
+                vetorizada = '%s %s %s' % (esquerda_vetor, op, direita_vetor)
+            elif op == '/':
+                expressao = '_dividir(%s, %s)' % (esquerda, direita)
+                vetorizada = '_dividir_vetor(%s, %s)' % (esquerda_vetor, direita_vetor)
+            elif op in ('max', 'min'):
+                expressao = '%s(%s, %s)' % (op, esquerda, direita)
+                vetorizada = '_%s(%s, %s)' % (op, esquerda_vetor, direita_vetor)
+            else:
+                expressao = '0'
+
+        return 'v%d' % self._novo_no(chave, expressao, vetorizada)
+
+    def _gerar_funcao(self, vetorizada=False):
+        linhas = ['def avaliar(s):']
+        if self.usa_todos_coletados:
+            linhas.append("    todos_coletados = s.get('recursos_coletados', 0) == s.get('total_recursos', 5)")
+        for indice, (_, expressao, expressao_vetor) in enumerate(self.nos):
+            linhas.append('    v%d = %s' % (indice, expressao_vetor if vetorizada else expressao))
+        linhas.append('    return %s, %s' % self.raizes)
+
+        escopo = {'np': np, '_dividir': _dividir, '_dividir_vetor': _dividir_vetor,
+                  '_min': _min_vetor, '_max': _max_vetor}
+        exec(compile('\n'.join(linhas), '<avaliador_compilado>', 'exec'), escopo)
+        return escopo['avaliar']
+
 class IndividuoPG:
-    def __init__(self, profundidade=3):
+    # Aumentando a probabilidade de operadores relacionados à meta
+    OPERADORES = [
+        '+', '-', '*', '/', 'max', 'min', 'abs', 
+        'if_positivo', 'if_negativo', 'if_then_else',
+        'sin', 'cos', 'media', 'prioridade',
+        'if_recurso_proximo',
+        'if_todos_coletados',
+        'if_energia_baixa',
+        'if_meta_proxima',
+        'if_meta_proxima',
+        'if_meta_proxima',  # Triplicando a chance deste operador
+        'ir_para_meta'  # Novo operador específico
+    ]
+    # Operadores que geram filhos (os demais viram folha na criação)
+    OPERADORES_COM_FILHOS = ['+', '-', '*', '/', 'max', 'min', 'prioridade', 'media',
+                             'abs', 'sin', 'cos', 'if_then_else']
+
+    def __init__(self, profundidade=3, arvores=None):
         self.profundidade = profundidade
-        self.arvore_aceleracao = self.criar_arvore_aleatoria()
-        self.arvore_rotacao = self.criar_arvore_aleatoria()
+        if arvores is None:
+            self.arvore_aceleracao = self.criar_arvore_aleatoria()
+            self.arvore_rotacao = self.criar_arvore_aleatoria()
+        else:
+            # Árvores prontas (ex.: lidas de um arquivo), sem sortear novas
+            self.arvore_aceleracao, self.arvore_rotacao = arvores
         self.fitness = 0
+        self.avaliador = None  # AvaliadorCompilado, criado sob demanda
+        self.id = None  # Atribuído pelo ArquivoPopulacao
+        self.pais = ()  # Ids dos pais (linhagem)
 
     def criar_arvore_aleatoria(self):
         if self.profundidade == 0:
             return self.criar_folha()
 
-        # Aumentando a probabilidade de operadores relacionados à meta
-        operadores = [
-            '+', '-', '*', '/', 'max', 'min', 'abs', 
-            'if_positivo', 'if_negativo', 'if_then_else',
-            'sin', 'cos', 'media', 'prioridade',
-            'if_recurso_proximo',
-            'if_todos_coletados',
-            'if_energia_baixa',
-            'if_meta_proxima',
-            'if_meta_proxima',
-            'if_meta_proxima',  # Triplicando a chance deste operador
-            'ir_para_meta'  # Novo operador específico
-        ]
-        
-        operador = random.choice(operadores)
+        operador = random.choice(self.OPERADORES)
 
         if operador in ['+', '-', '*', '/', 'max', 'min', 'prioridade', 'media']:
             return {
@@ -606,6 +1113,55 @@ class IndividuoPG:
         else:
             return self.criar_folha()
 
+    def criar_arvore(self, profundidade, metodo='grow'):
+        # 'full': operadores com filhos até a profundidade máxima;
+        # 'grow': mesma escolha de criar_arvore_aleatoria (pode parar antes)
+        if profundidade == 0:
+            return self.criar_folha()
+
+        lista = self.OPERADORES_COM_FILHOS if metodo == 'full' else self.OPERADORES
+        operador = random.choice(lista)
+
+        if operador in ['+', '-', '*', '/', 'max', 'min', 'prioridade', 'media']:
+            return {
+                'tipo': 'operador',
+                'operador': operador,
+                'esquerda': self.criar_arvore(profundidade - 1, metodo),
+                'direita': self.criar_arvore(profundidade - 1, metodo)
+            }
+        elif operador in ['abs', 'sin', 'cos']:
+            return {
+                'tipo': 'operador',
+                'operador': operador,
+                'esquerda': self.criar_arvore(profundidade - 1, metodo),
+                'direita': None
+            }
+        elif operador == 'if_then_else':
+            return {
+                'tipo': 'operador',
+                'operador': operador,
+                'condicao': self.criar_arvore(profundidade - 1, metodo),
+                'entao': self.criar_arvore(profundidade - 1, metodo),
+                'senao': self.criar_arvore(profundidade - 1, metodo)
+            }
+        else:
+            return self.criar_folha()
+
+    @classmethod
+    def rampa(cls, n, profundidade_minima=2, profundidade_maxima=5):
+        """Ramped half-and-half: profundidades de minima a maxima, metade
+        das árvores pelo método 'full' e metade pelo 'grow'"""
+        profundidades = list(range(profundidade_minima, max(profundidade_minima, profundidade_maxima) + 1))
+        individuos = []
+        for i in range(n):
+            profundidade = profundidades[i % len(profundidades)]
+            metodo = 'full' if (i // len(profundidades)) % 2 == 0 else 'grow'
+            individuo = cls(profundidade, arvores=(None, None))
+            individuo.arvore_aceleracao = individuo.criar_arvore(profundidade, metodo)
+            individuo.arvore_rotacao = individuo.criar_arvore(profundidade, metodo)
+            individuos.append(individuo)
+        return individuos
+
     def criar_folha(self):
         tipo = random.choice([
             'constante', 'dist_recurso', 'dist_obstaculo', 'dist_meta',
@@ -620,14 +1176,35 @@ class IndividuoPG:
         else:
             return {'tipo': 'folha', 'variavel': tipo}
 
-    def avaliar(self, sensores, tipo='aceleracao'):
+    def avaliar(self, sensores, tipo='aceleracao', cache=None):
         arvore = self.arvore_aceleracao if tipo == 'aceleracao' else self.arvore_rotacao
-        return self.avaliar_no(arvore, sensores)
+        return self.avaliar_no(arvore, sensores, cache)
+
+    def compilar(self):
+        # Recompila se alguma árvore foi substituída (ex.: carregar)
+        avaliador = self.avaliador
+        if avaliador is None or avaliador.arvores[0] is not self.arvore_aceleracao \
+                or avaliador.arvores[1] is not self.arvore_rotacao:
+            self.avaliador = AvaliadorCompilado(self.arvore_aceleracao, self.arvore_rotacao)
+        return self.avaliador
 
-    def avaliar_no(self, no, sensores):
+    def avaliar_ambas(self, sensores, cache=None):
+        # Retorna (aceleracao, rotacao) em uma única passada pelas árvores
+        return self.compilar()(sensores, cache)
+
+    def avaliar_no(self, no, sensores, cache=None, memorizar=True):
         if no is None:
             return 0
 
+        if cache is not None and memorizar:
+            chave = cache.chave_no(no, sensores)
+            if chave is not None:
+                valor = cache.buscar(chave)
+                if valor is SEM_VALOR:
+                    valor = self.avaliar_no(no, sensores, cache, memorizar=False)
+                    cache.guardar(chave, valor)
+                return valor
+
         if no['tipo'] == 'folha':
             if 'valor' in no:
                 return no['valor']
@@ -643,15 +1220,15 @@ class IndividuoPG:
         op = no.get('operador')
 
         if op == 'abs':
-            return abs(self.avaliar_no(no.get('esquerda'), sensores))
+            return abs(self.avaliar_no(no.get('esquerda'), sensores, cache))
         elif op == 'sin':
-            valor = self.avaliar_no(no.get('esquerda'), sensores)
+            valor = self.avaliar_no(no.get('esquerda'), sensores, cache)
             return np.sin(min(max(valor, -np.pi), np.pi))  # Limita o valor do seno
         elif op == 'cos':
-            valor = self.avaliar_no(no.get('esquerda'), sensores)
+            valor = self.avaliar_no(no.get('esquerda'), sensores, cache)
             return np.cos(min(max(valor, -np.pi), np.pi))  # Limita o valor do cosseno
         elif op == 'media':
-            return (self.avaliar_no(no.get('esquerda'), sensores) + self.avaliar_no(no.get('direita'), sensores)) / 2
+            return (self.avaliar_no(no.get('esquerda'), sensores, cache) + self.avaliar_no(no.get('direita'), sensores, cache)) / 2
         elif op == 'prioridade':
             # Nova lógica de priorização mais forte
             recursos_coletados = sensores.get('recursos_coletados', 0)
@@ -659,13 +1236,13 @@ class IndividuoPG:
             
             if recursos_coletados == total_recursos:
                 # Se todos os recursos foram coletados, força prioridade para meta
-                return self.avaliar_no(no.get('direita'), sensores) * 2  # Multiplicador para forçar direção à meta
+                return self.avaliar_no(no.get('direita'), sensores, cache) * 2  # Multiplicador para forçar direção à meta
             else:
                 # Se ainda há recursos, prioriza o recurso mais próximo
-                return self.avaliar_no(no.get('esquerda'), sensores)
+                return self.avaliar_no(no.get('esquerda'), sensores, cache)
         elif op == 'if_then_else':
-            cond = self.avaliar_no(no.get('condicao'), sensores)
-            return self.avaliar_no(no.get('entao'), sensores) if cond > 0 else self.avaliar_no(no.get('senao'), sensores)
+            cond = self.avaliar_no(no.get('condicao'), sensores, cache)
+            return self.avaliar_no(no.get('entao'), sensores, cache) if cond > 0 else self.avaliar_no(no.get('senao'), sensores, cache)
         elif op == 'if_recurso_proximo':
             dist_recurso = sensores.get('dist_recurso', float('inf'))
             return 1 if dist_recurso < 200 else -1
@@ -692,8 +1269,8 @@ class IndividuoPG:
                 # Caso contrário, retorna 0 (sem influência)
                 return 0
 
-        esquerda = self.avaliar_no(no.get('esquerda'), sensores)
-        direita = self.avaliar_no(no.get('direita'), sensores) if no.get('direita') is not None else 0
+        esquerda = self.avaliar_no(no.get('esquerda'), sensores, cache)
+        direita = self.avaliar_no(no.get('direita'), sensores, cache) if no.get('direita') is not None else 0
 
         # Limita os valores para evitar overflow
         esquerda = min(max(esquerda, -1000), 1000)
@@ -709,6 +1286,7 @@ class IndividuoPG:
         return 0
 
     def mutacao(self, probabilidade=0.4):
+        self.avaliador = None  # As árvores são alteradas no lugar
         self.mutacao_no(self.arvore_aceleracao, probabilidade)
         self.mutacao_no(self.arvore_rotacao, probabilidade)
 
@@ -728,6 +1306,7 @@ class IndividuoPG:
                     '+', '-', '*', '/', 'max', 'min', 'abs', 'sin', 'cos',
                     'media', 'prioridade', 'if_then_else'
                 ])
+                self.ajustar_filhos(no)
 
         if no['tipo'] == 'operador':
             if 'condicao' in no:
@@ -739,10 +1318,58 @@ class IndividuoPG:
                 if no['direita'] is not None:
                     self.mutacao_no(no['direita'], probabilidade)
 
+    def ajustar_filhos(self, no):
+        # Após trocar o operador, reaproveita as subárvores nos campos que o
+        # novo operador usa, cria folhas para os que faltam e descarta o resto
+        # (subárvores que avaliar_no ignoraria só aumentariam a árvore)
+        campos_antigos = ('condicao', 'entao', 'senao') if 'condicao' in no else ('esquerda', 'direita')
+        antigos = [no.pop(campo) for campo in campos_antigos if campo in no]
+        antigos = [filho for filho in antigos if filho is not None]
+        for campo in ('condicao', 'entao', 'senao', 'esquerda', 'direita'):
+            no.pop(campo, None)
+        for campo in filhos_usados(no):
+            no[campo] = antigos.pop(0) if antigos else self.criar_folha()
+        if no['operador'] in OPERADORES_UNARIOS:
+            no['direita'] = None
+
+    def tamanho(self):
+        return tamanho_arvore(self.arvore_aceleracao) + tamanho_arvore(self.arvore_rotacao)
+
+    def profundidade_maxima(self):
+        return max(profundidade_arvore(self.arvore_aceleracao), profundidade_arvore(self.arvore_rotacao))
+
+    def podar(self, no, profundidade):
+        # Troca por folhas os nós abaixo da profundidade máxima
+        if no is None or no['tipo'] == 'folha':
+            return no
+        if profundidade <= 0:
+            return self.criar_folha()
+        for campo in filhos_usados(no):
+            no[campo] = self.podar(no.get(campo), profundidade - 1)
+        return no
+
+    def limitar(self, max_nos=None, max_profundidade=None):
+        self.avaliador = None
+        if max_profundidade is not None:
+            self.arvore_aceleracao = self.podar(self.arvore_aceleracao, max_profundidade)
+            self.arvore_rotacao = self.podar(self.arvore_rotacao, max_profundidade)
+        if max_nos is not None:
+            if max_nos < 2:
+                raise ValueError(f"max_nos deve ser pelo menos 2 (uma folha por árvore), recebido {max_nos}")
+            # Poda a maior árvore um nível por vez até caber no limite
+            while self.tamanho() > max_nos:
+                if tamanho_arvore(self.arvore_aceleracao) >= tamanho_arvore(self.arvore_rotacao):
+                    arvore = self.arvore_aceleracao
+                    self.arvore_aceleracao = self.podar(arvore, profundidade_arvore(arvore) - 1)
+                else:
+                    arvore = self.arvore_rotacao
+                    self.arvore_rotacao = self.podar(arvore, profundidade_arvore(arvore) - 1)
+
     def crossover(self, outro):
         novo = IndividuoPG(self.profundidade)
         novo.arvore_aceleracao = self.crossover_no(self.arvore_aceleracao, outro.arvore_aceleracao)
         novo.arvore_rotacao = self.crossover_no(self.arvore_rotacao, outro.arvore_rotacao)
+        novo.pais = (self.id, outro.id)
         return novo
 
     def crossover_no(self, no1, no2):
@@ -756,142 +1383,1237 @@ class IndividuoPG:
             }, f)
 
     @classmethod
-    def carregar(cls, arquivo):
+    def carregar(cls, arquivo, id_individuo=None):
+        # Com id_individuo, lê o indivíduo de um ArquivoPopulacao
+        if id_individuo is not None:
+            arquivo_populacao = ArquivoPopulacao(arquivo, somente_leitura=True)
+            try:
+                return arquivo_populacao.carregar(id_individuo)
+            finally:
+                arquivo_populacao.fechar()
         with open(arquivo, 'r') as f:
             dados = json.load(f)
-            individuo = cls()
-            individuo.arvore_aceleracao = dados['arvore_aceleracao']
-            individuo.arvore_rotacao = dados['arvore_rotacao']
-            return individuo
+            return cls(arvores=(dados['arvore_aceleracao'], dados['arvore_rotacao']))
+
+# Codificação compacta das árvores (pré-ordem): 1 byte de código por nó,
+# seguido do índice do operador/variável ou do valor da constante. Os filhos
+# de cada operador são os de filhos_usados, na mesma ordem.
+OPERADORES_CODIGO = [
+    '+', '-', '*', '/', 'max', 'min', 'abs', 'sin', 'cos', 'media', 'prioridade',
+    'if_then_else', 'if_positivo', 'if_negativo', 'if_recurso_proximo',
+    'if_todos_coletados', 'if_energia_baixa', 'if_meta_proxima', 'ir_para_meta'
+]
+VARIAVEIS_CODIGO = [
+    'dist_recurso', 'dist_obstaculo', 'dist_meta', 'angulo_recurso', 'angulo_meta',
+    'energia', 'velocidade', 'meta_atingida', 'recursos_restantes',
+    'distancia_ultima_posicao', 'tempo_restante'
+]
+COD_NADA, COD_CONSTANTE, COD_VARIAVEL, COD_OPERADOR, COD_VARIAVEL_NOME, \
+    COD_OPERADOR_NOME, COD_VALOR_JSON, COD_FOLHA_VAZIA = range(8)
+
+def _codificar_texto(saida, texto):
+    dados = texto.encode('utf-8')
+    saida += struct.pack('<H', len(dados))
+    saida += dados
+
+def codificar_arvore(no, saida=None):
+    if saida is None:
+        saida = bytearray()
+    if no is None:
+        saida.append(COD_NADA)
+    elif no['tipo'] == 'folha':
+        if 'valor' in no:
+            if type(no['valor']) is float:
+                saida.append(COD_CONSTANTE)
+                saida += struct.pack('<d', no['valor'])
+            else:
+                saida.append(COD_VALOR_JSON)
+                _codificar_texto(saida, json.dumps(no['valor']))
+        elif 'variavel' in no:
+            if no['variavel'] in VARIAVEIS_CODIGO:
+                saida.append(COD_VARIAVEL)
+                saida.append(VARIAVEIS_CODIGO.index(no['variavel']))
+            else:
+                saida.append(COD_VARIAVEL_NOME)
+                _codificar_texto(saida, no['variavel'])
+        else:
+            saida.append(COD_FOLHA_VAZIA)
+    else:
+        op = no.get('operador')
+        if op in OPERADORES_CODIGO:
+            saida.append(COD_OPERADOR)
+            saida.append(OPERADORES_CODIGO.index(op))
+        else:
+            saida.append(COD_OPERADOR_NOME)
+            _codificar_texto(saida, json.dumps(op))
+        for campo in filhos_usados(no):
+            codificar_arvore(no.get(campo), saida)
+    return saida
+
+def _decodificar_texto(dados, pos):
+    tamanho, = struct.unpack_from('<H', dados, pos)
+    return bytes(dados[pos + 2:pos + 2 + tamanho]).decode('utf-8'), pos + 2 + tamanho
+
+def decodificar_arvore(dados, pos=0):
+    """Retorna (árvore, posição seguinte). Filhos ignorados por avaliar_no
+    não são guardados, então a árvore lida avalia igual à original."""
+    codigo = dados[pos]
+    pos += 1
+    if codigo == COD_NADA:
+        return None, pos
+    if codigo == COD_CONSTANTE:
+        return {'tipo': 'folha', 'valor': struct.unpack_from('<d', dados, pos)[0]}, pos + 8
+    if codigo == COD_VALOR_JSON:
+        texto, pos = _decodificar_texto(dados, pos)
+        return {'tipo': 'folha', 'valor': json.loads(texto)}, pos
+    if codigo == COD_VARIAVEL:
+        return {'tipo': 'folha', 'variavel': VARIAVEIS_CODIGO[dados[pos]]}, pos + 1
+    if codigo == COD_VARIAVEL_NOME:
+        texto, pos = _decodificar_texto(dados, pos)
+        return {'tipo': 'folha', 'variavel': texto}, pos
+    if codigo == COD_FOLHA_VAZIA:
+        return {'tipo': 'folha'}, pos
+
+    if codigo == COD_OPERADOR:
+        op = OPERADORES_CODIGO[dados[pos]]
+        pos += 1
+    else:
+        texto, pos = _decodificar_texto(dados, pos)
+        op = json.loads(texto)
+    no = {'tipo': 'operador', 'operador': op}
+    for campo in filhos_usados(no):
+        no[campo], pos = decodificar_arvore(dados, pos)
+    if 'condicao' not in no:
+        no.setdefault('esquerda', None)
+        no.setdefault('direita', None)
+    return no, pos
+
+class ArquivoPopulacao:
+    """Arquivo binário, só de acréscimo, com todos os indivíduos avaliados.
+
+    O arquivo de dados guarda, para cada registro, um cabeçalho fixo
+    (id, fitness, geração, pais, tamanhos) seguido das duas árvores na
+    codificação compacta. O índice (mesmo nome + '.idx') é um vetor de
+    registros de tamanho fixo (DTYPE_INDICE) que pode ser lido com
+    np.memmap e filtrado sem criar objetos Python. O id é a posição no
+    índice, então carregar(id) é O(1). Com somente_leitura=True nenhum
+    arquivo é criado ou aberto para escrita.
+    """
+    MAGICO = b'PGA1'
+    CABECALHO = struct.Struct('<QdIqqII')
+    DTYPE_INDICE = np.dtype([
+        ('id', '<u8'), ('offset', '<u8'), ('fitness', '<f8'), ('geracao', '<u4'),
+        ('pai1', '<i8'), ('pai2', '<i8'), ('tamanho', '<u4')
+    ])
+
+    def __init__(self, caminho, somente_leitura=False):
+        self.caminho = caminho
+        self.caminho_indice = caminho + '.idx'
+        self.somente_leitura = somente_leitura
+        if not somente_leitura and not os.path.exists(caminho):
+            with open(caminho, 'wb') as f:
+                f.write(self.MAGICO)
+            open(self.caminho_indice, 'wb').close()
+        with open(caminho, 'rb') as f:
+            if f.read(len(self.MAGICO)) != self.MAGICO:
+                raise ValueError(f"{caminho} não é um arquivo de população")
+        if somente_leitura:
+            self.arquivo_dados = self.arquivo_indice = None
+        else:
+            self.arquivo_dados = open(caminho, 'ab')
+            self.arquivo_indice = open(self.caminho_indice, 'ab')
+        self._total = os.path.getsize(self.caminho_indice) // self.DTYPE_INDICE.itemsize
+        self._mapa = None
+
+    def __len__(self):
+        return self._total
+
+    def adicionar(self, individuo, geracao=0):
+        id_individuo = self._escrever(individuo, geracao)
+        self.sincronizar()
+        return id_individuo
+
+    def _escrever(self, individuo, geracao):
+        if self.somente_leitura:
+            raise ValueError(f"{self.caminho} foi aberto somente para leitura")
+        arvores = codificar_arvore(individuo.arvore_aceleracao), codificar_arvore(individuo.arvore_rotacao)
+        pais = tuple(p if p is not None else -1 for p in (list(individuo.pais) + [None, None])[:2])
+        id_individuo = self._total
+        offset = self.arquivo_dados.tell()
+        self.arquivo_dados.write(self.CABECALHO.pack(
+            id_individuo, individuo.fitness, geracao, pais[0], pais[1], len(arvores[0]), len(arvores[1])))
+        self.arquivo_dados.write(arvores[0])
+        self.arquivo_dados.write(arvores[1])
+        entrada = np.array([(id_individuo, offset, individuo.fitness, geracao, pais[0], pais[1],
+                             self.CABECALHO.size + len(arvores[0]) + len(arvores[1]))],
+                           dtype=self.DTYPE_INDICE)
+        self.arquivo_indice.write(entrada.tobytes())
+        self._total += 1
+        individuo.id = id_individuo
+        return id_individuo
+
+    def adicionar_populacao(self, populacao, geracao=0):
+        ids = [self._escrever(individuo, geracao) for individuo in populacao]
+        self.sincronizar()
+        return ids
+
+    def sincronizar(self):
+        if self.somente_leitura:
+            return
+        self.arquivo_dados.flush()
+        self.arquivo_indice.flush()
+
+    def indice(self):
+        # Visão somente leitura do índice (np.memmap), sem carregar árvores
+        self.sincronizar()
+        if self._total == 0:
+            return np.empty(0, dtype=self.DTYPE_INDICE)
+        return np.memmap(self.caminho_indice, dtype=self.DTYPE_INDICE, mode='r', shape=(self._total,))
+
+    def filtrar(self, fitness_minimo=None, geracao=None):
+        indice = self.indice()
+        mascara = np.ones(len(indice), dtype=bool)
+        if fitness_minimo is not None:
+            mascara &= indice['fitness'] >= fitness_minimo
+        if geracao is not None:
+            mascara &= indice['geracao'] == geracao
+        return np.asarray(indice['id'][mascara])
+
+    def melhores(self, n):
+        indice = self.indice()
+        n = min(n, len(indice))
+        if n == 0:
+            return np.empty(0, dtype='<u8')
+        escolhidos = np.argpartition(-indice['fitness'], n - 1)[:n]
+        return np.asarray(indice['id'][escolhidos[np.argsort(-indice['fitness'][escolhidos])]])
+
+    def _dados(self):
+        # Remapeia o arquivo de dados quando ele cresceu
+        self.sincronizar()
+        tamanho = os.path.getsize(self.caminho)
+        if self._mapa is None or len(self._mapa) < tamanho:
+            if self._mapa is not None:
+                self._mapa.close()
+            with open(self.caminho, 'rb') as f:
+                self._mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mapa
+
+    def carregar(self, id_individuo):
+        return self.carregar_varios([id_individuo])[0]
+
+    def carregar_varios(self, ids):
+        # Leitura em lote: um único mapeamento do índice e dos dados
+        offsets = self.indice()['offset']
+        dados = self._dados()
+        individuos = []
+        for id_individuo in ids:
+            if id_individuo is None or not 0 <= id_individuo < self._total:
+                raise KeyError(id_individuo)
+            individuos.append(self._ler_registro(dados, int(offsets[id_individuo]), id_individuo))
+        return individuos
+
+    def _ler_registro(self, dados, offset, id_individuo):
+        _, fitness, _, pai1, pai2, _, _ = self.CABECALHO.unpack_from(dados, offset)
+        pos = offset + self.CABECALHO.size
+        arvore_aceleracao, pos = decodificar_arvore(dados, pos)
+        arvore_rotacao, pos = decodificar_arvore(dados, pos)
+        individuo = IndividuoPG(arvores=(arvore_aceleracao, arvore_rotacao))
+        individuo.fitness = fitness
+        individuo.id = int(id_individuo)
+        individuo.pais = tuple(p if p >= 0 else None for p in (pai1, pai2))
+        return individuo
+
+    def fechar(self):
+        if not self.somente_leitura:
+            self.arquivo_dados.close()
+            self.arquivo_indice.close()
+        if self._mapa is not None:
+            self._mapa.close()
+            self._mapa = None
+
+def e_arquivo_populacao(caminho):
+    with open(caminho, 'rb') as f:
+        return f.read(len(ArquivoPopulacao.MAGICO)) == ArquivoPopulacao.MAGICO
+
+def carregar_sementes(fontes, n_maximo):
+    """Indivíduos para semear a população inicial.
+
+    Cada fonte pode ser um IndividuoPG, um JSON salvo com IndividuoPG.salvar
+    ou um ArquivoPopulacao/checkpoint, do qual são lidos em lote os
+    n_maximo indivíduos de maior fitness.
+    """
+    sementes = []
+    for fonte in fontes:
+        if isinstance(fonte, IndividuoPG):
+            sementes.append(fonte)
+        elif e_arquivo_populacao(fonte):
+            arquivo = ArquivoPopulacao(fonte, somente_leitura=True)
+            try:
+                sementes.extend(arquivo.carregar_varios(arquivo.melhores(n_maximo).tolist()))
+            finally:
+                arquivo.fechar()
+        else:
+            sementes.append(IndividuoPG.carregar(fonte))
+    return sementes[:n_maximo]
+
+def gerar_sondas(n_sondas=32, semente=0):
+    """Conjunto fixo de vetores de sensores usado para comparar comportamentos"""
+    rng = np.random.default_rng(semente)
+    sondas = []
+    for _ in range(n_sondas):
+        sondas.append({
+            'dist_recurso': float('inf') if rng.random() < 0.1 else float(rng.uniform(0, 1000)),
+            'dist_obstaculo': float(rng.uniform(0, 800)),
+            'dist_meta': float(rng.uniform(0, 1000)),
+            'angulo_recurso': float(rng.uniform(-np.pi, np.pi)),
+            'angulo_meta': float(rng.uniform(-np.pi, np.pi)),
+            'energia': float(rng.uniform(0, 100)),
+            'velocidade': float(rng.uniform(0.1, 5)),
+            'meta_atingida': bool(rng.random() < 0.2),
+            'total_recursos': 5
+        })
+    return sondas
+
+def vetorizar_sondas(sondas):
+    """Converte a lista de sondas em um dicionário de arrays (um por sensor),
+    no formato usado por AvaliadorCompilado.avaliar_lote"""
+    chaves = set().union(*sondas)
+    return {chave: np.array([float(sensores[chave]) for sensores in sondas]) for chave in chaves}
+
+def comportamento(individuo, sondas):
+    # Saídas (já limitadas como no simulador) para cada sonda; aceita a lista
+    # de sondas ou sua forma vetorizada
+    if not isinstance(sondas, dict):
+        sondas = vetorizar_sondas(sondas)
+    n = len(next(iter(sondas.values())))
+    aceleracao, rotacao = individuo.compilar().avaliar_lote(sondas, n)
+    saidas = np.empty((n, 2))
+    saidas[:, 0] = _max_vetor(-1, _min_vetor(1, aceleracao))
+    saidas[:, 1] = _max_vetor(-0.5, _min_vetor(0.5, rotacao))
+    return np.nan_to_num(saidas, nan=0.0).ravel()
+
+def entropia(rotulos):
+    """Entropia de Shannon (bits) da distribuição de rótulos"""
+    _, contagens = np.unique(np.asarray(rotulos), return_counts=True)
+    p = contagens / contagens.sum()
+    return float(-(p * np.log2(p)).sum())
+
+def medir_diversidade(populacao, sondas):
+    """Métricas baratas de diversidade da população: estrutural (hashes
+    únicos do par de árvores), de operadores (entropia dos rótulos das
+    raízes) e comportamental (saídas nas sondas fixas)."""
+    n = len(populacao)
+    hashes = {individuo.compilar().hash_par for individuo in populacao}
+    # Constantes contam como um único rótulo, sem o valor
+    raizes = ['%s|%s' % (rotulo_no(individuo.arvore_aceleracao)[:2], rotulo_no(individuo.arvore_rotacao)[:2])
+              for individuo in populacao]
+    comportamentos = np.array([comportamento(individuo, sondas) for individuo in populacao])
+    centro = comportamentos.mean(axis=0)
+    return {
+        'estruturas_unicas': len(hashes),
+        'fracao_estruturas_unicas': len(hashes) / n,
+        'entropia_operadores': entropia(raizes),
+        'comportamentos_unicos': len(np.unique(np.round(comportamentos, 6), axis=0)),
+        'dispersao_comportamental': float(np.linalg.norm(comportamentos - centro, axis=1).mean())
+    }
+
+class ModeloSubstituto:
+    """Estimativa barata de fitness para triar filhos antes da simulação.
+
+    Vizinhos mais próximos (k) no espaço de comportamento: as saídas do
+    indivíduo em um conjunto fixo de sondas. O modelo é treinado com os
+    indivíduos já simulados. Em cada geração são gerados fator_excesso vezes
+    mais filhos que o necessário e apenas os mais promissores são simulados;
+    uma fração de exploração é escolhida ao acaso para não viciar o modelo.
+    """
+
+    def __init__(self, k=5, fator_excesso=3, fracao_exploracao=0.1,
+                 max_amostras=5000, n_sondas=32):
+        self.k = k
+        self.fator_excesso = fator_excesso
+        self.fracao_exploracao = fracao_exploracao
+        self.max_amostras = max_amostras
+        self.sondas = vetorizar_sondas(gerar_sondas(n_sondas))
+        self.caracteristicas = np.empty((0, 2 * n_sondas))
+        self.fitness = np.empty(0)
+        self.previsoes = {}  # id(filho) -> (filho, fitness previsto)
+        self.registrados = {}  # id -> indivíduo da última população registrada
+
+    def registrar(self, populacao):
+        # Mede a precisão das previsões feitas para esta população e treina
+        # o modelo com os valores reais
+        previstos, reais = [], []
+        for individuo in populacao:
+            previsao = self.previsoes.get(id(individuo))
+            if previsao is not None and previsao[0] is individuo:
+                previstos.append(previsao[1])
+                reais.append(individuo.fitness)
+        self.previsoes = {}
+
+        # A elite passa de uma geração para a outra; entra no treino uma vez só
+        novos = [i for i in populacao if self.registrados.get(id(i)) is not i]
+        self.registrados = {id(i): i for i in populacao}
+        if novos:
+            novas = np.array([comportamento(individuo, self.sondas) for individuo in novos])
+            self.caracteristicas = np.vstack([self.caracteristicas, novas])[-self.max_amostras:]
+            self.fitness = np.concatenate([self.fitness, [i.fitness for i in novos]])[-self.max_amostras:]
+
+        if len(previstos) < 2:
+            return None
+        previstos, reais = np.array(previstos), np.array(reais)
+        return {
+            'correlacao': correlacao_postos(previstos, reais),
+            'erro_medio': float(np.mean(np.abs(previstos - reais)))
+        }
+
+    def prever(self, caracteristicas):
+        # |a - b|² = |a|² + |b|² - 2ab, sem montar a matriz 3D de diferenças
+        quadrados = ((caracteristicas ** 2).sum(axis=1)[:, None] + (self.caracteristicas ** 2).sum(axis=1)[None, :]
+                     - 2 * caracteristicas @ self.caracteristicas.T)
+        distancias = np.sqrt(np.maximum(quadrados, 0))
+        k = min(self.k, len(self.fitness))
+        vizinhos = np.argpartition(distancias, k - 1, axis=1)[:, :k]
+        pesos = 1.0 / (np.take_along_axis(distancias, vizinhos, axis=1) + 1e-6)
+        return (self.fitness[vizinhos] * pesos).sum(axis=1) / pesos.sum(axis=1)
+
+    def triar(self, candidatos, n_escolhidos):
+        if len(self.fitness) < self.k or len(candidatos) <= n_escolhidos:
+            return candidatos[:n_escolhidos]
+
+        previstos = self.prever(np.array([comportamento(c, self.sondas) for c in candidatos]))
+        n_exploracao = int(n_escolhidos * self.fracao_exploracao)
+        ordem = list(np.argsort(-previstos))
+        escolhidos = ordem[:n_escolhidos - n_exploracao]
+        restantes = ordem[n_escolhidos - n_exploracao:]
+        escolhidos += random.sample(restantes, n_exploracao)
+
+        for i in escolhidos:
+            self.previsoes[id(candidatos[i])] = (candidatos[i], float(previstos[i]))
+        return [candidatos[i] for i in escolhidos]
+
+def correlacao_postos(a, b):
+    # Correlação de Spearman (sem tratamento de empates)
+    postos_a = np.argsort(np.argsort(a))
+    postos_b = np.argsort(np.argsort(b))
+    if postos_a.std() == 0 or postos_b.std() == 0:
+        return 0.0
+    return float(np.corrcoef(postos_a, postos_b)[0, 1])
+
+class RegraParada:
+    """Regra de parada antecipada de um episódio.
+
+    Subclasses implementam verificar(), que retorna True quando o episódio
+    não tem mais chance de melhorar. Cada regra pode ser desligada com
+    ativa=False e conta quantas vezes disparou e quantos passos evitou
+    (passos que faltavam até a primeira parada normal possível do episódio,
+    ver simular_tentativa; é um limite inferior da economia real).
+    """
+    nome = 'regra'
+
+    def __init__(self, ativa=True):
+        self.ativa = ativa
+        self.disparos = 0
+        self.passos_economizados = 0
+
+    def iniciar(self, robo, ambiente, contexto):
+        pass
+
+    def verificar(self, robo, ambiente, colidiu):
+        return False
+
+    def atualizar_geracao(self, fitness_populacao):
+        pass
+
+class RegraCiclosColisao(RegraParada):
+    # Robô preso batendo na parede: colisões na maioria dos últimos passos
+    nome = 'ciclos_colisao'
+
+    def __init__(self, janela=50, fracao=0.6, ativa=True):
+        super().__init__(ativa)
+        self.janela = janela
+        self.fracao = fracao
+
+    def iniciar(self, robo, ambiente, contexto):
+        self.historico = deque(maxlen=self.janela)
+        self.colisoes_janela = 0
+
+    def verificar(self, robo, ambiente, colidiu):
+        if len(self.historico) == self.janela:
+            self.colisoes_janela -= self.historico[0]
+        self.historico.append(colidiu)
+        self.colisoes_janela += colidiu
+        return len(self.historico) == self.janela and self.colisoes_janela >= self.fracao * self.janela
+
+class RegraEstagnacao(RegraParada):
+    # Robô girando em círculos: trajetória da janela cabe em uma caixa pequena
+    # e nenhum recurso foi coletado nesse intervalo
+    nome = 'estagnacao'
+
+    def __init__(self, janela=150, lado_minimo=30, intervalo=10, ativa=True):
+        super().__init__(ativa)
+        self.janela = janela
+        self.lado_minimo = lado_minimo
+        self.intervalo = intervalo
+
+    def iniciar(self, robo, ambiente, contexto):
+        self.posicoes = deque(maxlen=self.janela)
+        self.recursos = deque(maxlen=self.janela)
+
+    def verificar(self, robo, ambiente, colidiu):
+        self.posicoes.append((robo.x, robo.y))
+        self.recursos.append(robo.recursos_coletados)
+        if len(self.posicoes) < self.janela or ambiente.tempo % self.intervalo != 0:
+            return False
+        if self.recursos[0] != self.recursos[-1]:
+            return False
+        xs = [p[0] for p in self.posicoes]
+        ys = [p[1] for p in self.posicoes]
+        return max(xs) - min(xs) < self.lado_minimo and max(ys) - min(ys) < self.lado_minimo
+
+class RegraLimiteFitness(RegraParada):
+    """Para quando nem no melhor caso o indivíduo alcança o limiar de seleção.
+
+    O limite superior supõe que, no resto do episódio, o robô coleta todo
+    recurso alcançável à velocidade máxima, chega à meta se ela estiver ao
+    alcance, recupera toda a energia e não sofre penalidades; as tentativas
+    seguintes, que começam do zero, recebem o fitness máximo de uma
+    tentativa. O limiar é o quantil do fitness da geração anterior.
+
+    Como esse máximo (cerca de 9000) é bem maior que o fitness típico, o
+    limite só fica abaixo do limiar na última tentativa, e com o quantil
+    0.5 a regra praticamente não dispara; serve para limiares altos e por
+    isso vem desligada na PoliticaParada padrão.
+    """
+    nome = 'limite_fitness'
+    VELOCIDADE_MAXIMA = 5
+
+    def __init__(self, quantil=0.5, intervalo=10, ativa=True):
+        super().__init__(ativa)
+        self.quantil = quantil
+        self.intervalo = intervalo
+        self.limiar = None
+
+    def atualizar_geracao(self, fitness_populacao):
+        if len(fitness_populacao):
+            self.limiar = float(np.quantile(fitness_populacao, self.quantil))
+
+    def iniciar(self, robo, ambiente, contexto):
+        self.fitness_acumulado = contexto.get('fitness_acumulado', 0)
+        self.tentativas_restantes = contexto.get('tentativas_restantes', 0)
+
+    def limite_tentativa(self, robo, ambiente, alcance):
+        recursos = robo.recursos_coletados + sum(
+            1 for r in ambiente.recursos
+            if not r['coletado'] and np.hypot(robo.x - r['x'], robo.y - r['y']) - robo.raio - 10 < alcance)
+        meta = robo.meta_atingida or \
+            np.hypot(robo.x - ambiente.meta['x'], robo.y - ambiente.meta['y']) - robo.raio - ambiente.meta['raio'] < alcance
+        return (recursos * 300 + (robo.distancia_percorrida + alcance) * 0.2 + 1000 * 0.5 + 100 * 0.3 +
+                (1000 - robo.colisoes * 30) + (5000 if meta else 0))
+
+    def maximo_tentativa(self, ambiente):
+        # Melhor caso de uma tentativa nova: todos os recursos, a meta,
+        # distância máxima, sem tempo parado, sem colisões e energia cheia
+        return (len(ambiente.recursos) * 300 + ambiente.max_tempo * self.VELOCIDADE_MAXIMA * 0.2 +
+                1000 * 0.5 + 100 * 0.3 + 1000 + 5000)
+
+    def verificar(self, robo, ambiente, colidiu):
+        if self.limiar is None or ambiente.tempo % self.intervalo != 0:
+            return False
+        alcance = (ambiente.max_tempo - ambiente.tempo) * self.VELOCIDADE_MAXIMA
+        maximo_tentativa = self.maximo_tentativa(ambiente)
+        limite = (self.fitness_acumulado + max(0, self.limite_tentativa(robo, ambiente, alcance)) +
+                  self.tentativas_restantes * maximo_tentativa) / TENTATIVAS
+        return limite < self.limiar
+
+class PoliticaParada:
+    """Conjunto de regras de parada antecipada usado em simular_tentativa"""
+
+    def __init__(self, regras=None):
+        if regras is None:
+            # RegraLimiteFitness quase nunca dispara com o quantil padrão: fica
+            # disponível, mas desligada (ativar('limite_fitness') para usar)
+            regras = [RegraCiclosColisao(), RegraEstagnacao(), RegraLimiteFitness(ativa=False)]
+        self.regras = regras
+
+    def regra(self, nome):
+        for regra in self.regras:
+            if regra.nome == nome:
+                return regra
+        raise KeyError(nome)
+
+    def ativar(self, nome, ativa=True):
+        self.regra(nome).ativa = ativa
+
+    def iniciar_tentativa(self, robo, ambiente, contexto):
+        for regra in self.regras:
+            if regra.ativa:
+                regra.iniciar(robo, ambiente, contexto)
+
+    def verificar(self, robo, ambiente, colidiu, passos_restantes=None):
+        # Retorna o nome da regra que encerrou o episódio, ou None.
+        # passos_restantes: passos até a primeira parada normal possível
+        if passos_restantes is None:
+            passos_restantes = ambiente.max_tempo - ambiente.tempo
+        for regra in self.regras:
+            if regra.ativa and regra.verificar(robo, ambiente, colidiu):
+                regra.disparos += 1
+                regra.passos_economizados += max(0, passos_restantes)
+                return regra.nome
+        return None
+
+    def atualizar_geracao(self, fitness_populacao):
+        for regra in self.regras:
+            regra.atualizar_geracao(fitness_populacao)
+
+    def estatisticas(self):
+        return {regra.nome: {'disparos': regra.disparos, 'passos_economizados': regra.passos_economizados}
+                for regra in self.regras if regra.ativa}
+
+    def zerar_estatisticas(self):
+        for regra in self.regras:
+            regra.disparos = 0
+            regra.passos_economizados = 0
+
+TENTATIVAS = 5  # Simulações por indivíduo
+
+# Motores de avaliação das árvores: interpretador recursivo (IndividuoPG.avaliar)
+# ou função gerada por AvaliadorCompilado; os dois dão o mesmo resultado.
+# Não há motor vetorizado: cada passo depende do anterior (e Robo.mover sorteia
+# do random global), então um episódio avalia um vetor de sensores por vez. A
+# versão vetorizada (AvaliadorCompilado.avaliar_lote) é usada em lote só nas
+# sondas de diversidade, onde concorda com a escalar a menos de ~1e-3.
+MOTORES = ('escalar', 'compilado')
+
+def calcular_fitness_tentativa(robo, ambiente, tempo_apos_coleta):
+    # Calcular fitness 
+    fitness_tentativa = (
+        robo.recursos_coletados * 300 +  # Aumentado de 100 para 300
+        robo.distancia_percorrida * 0.2 +  # Aumentado de 0.1 para 0.2
+        (1000 - robo.tempo_parado) * 0.5 +  # Novo: penalidade por ficar parado
+        robo.energia * 0.3 +  # Novo: bônus por manter energia
+        (1000 - robo.colisoes * 30) +  # Reduzido de 50 para 30
+        (5000 if robo.meta_atingida else 0)  # Aumentado de 500 para 5000
+    )
+    
+    # Penalidades adicionais
+    if robo.recursos_coletados == 0:
+        fitness_tentativa *= 0.3  # Penalidade maior por não coletar recursos
+    elif robo.recursos_coletados < len(ambiente.recursos) and robo.meta_atingida:
+        fitness_tentativa *= 0.5  # Penalidade por ir para meta sem coletar tudo
+    elif robo.recursos_coletados == len(ambiente.recursos) and not robo.meta_atingida:
+        fitness_tentativa *= 0.5  # Penalidade maior por não ir para meta após coletar tudo
+        # Penalidade adicional baseada no tempo após coleta
+        fitness_tentativa *= max(0.5, 1 - (tempo_apos_coleta / 100))
+    
+    return max(0, fitness_tentativa)
+
+def simular_tentativa(individuo, ambiente, robo, leitor_sensores, cache=None, politica=None, contexto=None,
+                      motor='compilado', trajetoria=None):
+    """Simula um episódio e retorna (fitness da tentativa, estatísticas);
+    se trajetoria for uma lista, recebe as posições (x, y) do robô"""
+    ambiente.reset()
+    robo.reset(ambiente.largura // 2, ambiente.altura // 2)
+    leitor_sensores.reset()
+    ultima_distancia_recurso = float('inf')
+    ultima_distancia_meta = float('inf')
+    tempo_sem_progresso = 0
+    recursos_coletados_anterior = 0
+    tempo_apos_coleta = 0
+    passos = 0
+    regra = None
+    if politica is not None:
+        politica.iniciar_tentativa(robo, ambiente, contexto or {})
+    if trajetoria is not None:
+        trajetoria.append((robo.x, robo.y))
+    
+    while True:
+        # Obter sensores
+        sensores = leitor_sensores.ler()
+        sensores['total_recursos'] = len(ambiente.recursos)
+        
+        # Avaliar árvores de decisão
+        if motor == 'escalar':
+            aceleracao = individuo.avaliar(sensores, 'aceleracao', cache)
+            rotacao = individuo.avaliar(sensores, 'rotacao', cache)
+        else:
+            aceleracao, rotacao = individuo.avaliar_ambas(sensores, cache)
+        
+        # Limitar valores
+        aceleracao = max(-1, min(1, aceleracao))
+        rotacao = max(-0.5, min(0.5, rotacao))
+        
+        # Mover robô
+        colisoes_anteriores = robo.colisoes
+        sem_energia = robo.mover(aceleracao, rotacao, ambiente)
+        passos += 1
+        if trajetoria is not None:
+            trajetoria.append((robo.x, robo.y))
+        
+        # Verificar progresso
+        nova_distancia_recurso = sensores.get('dist_recurso', float('inf'))
+        nova_distancia_meta = sensores.get('dist_meta', float('inf'))
+        
+        # Verificar progresso na coleta
+        if robo.recursos_coletados > recursos_coletados_anterior:
+            recursos_coletados_anterior = robo.recursos_coletados
+            tempo_sem_progresso = 0
+            tempo_apos_coleta = 0
+        # Verificar progresso em direção à meta após coleta completa
+        elif robo.recursos_coletados == len(ambiente.recursos):
+            tempo_apos_coleta += 1
+            if nova_distancia_meta < ultima_distancia_meta:
+                tempo_sem_progresso = 0
+            else:
+                tempo_sem_progresso += 1
+        # Verificar progresso em direção ao recurso
+        elif nova_distancia_recurso < ultima_distancia_recurso:
+            tempo_sem_progresso = 0
+        else:
+            tempo_sem_progresso += 1
+        
+        ultima_distancia_recurso = nova_distancia_recurso
+        ultima_distancia_meta = nova_distancia_meta
+        
+        # Verificar fim da simulação
+        if sem_energia or ambiente.passo() or tempo_sem_progresso > 50 or (tempo_apos_coleta > 100 and robo.recursos_coletados == len(ambiente.recursos)):
+            break
+        
+        # Regras de parada antecipada (opcionais). Os passos evitados são
+        # contados até a parada normal mais próxima possível: fim do tempo,
+        # 51 passos sem progresso, 101 após a coleta completa ou energia
+        # esgotada no consumo máximo (0.4 por passo)
+        if politica is not None:
+            passos_restantes = min(ambiente.max_tempo - ambiente.tempo, 51 - tempo_sem_progresso,
+                                   int(np.ceil(robo.energia / 0.4)))
+            if robo.recursos_coletados == len(ambiente.recursos):
+                passos_restantes = min(passos_restantes, 101 - tempo_apos_coleta)
+            regra = politica.verificar(robo, ambiente, robo.colisoes > colisoes_anteriores, passos_restantes)
+            if regra is not None:
+                break
+    
+    return calcular_fitness_tentativa(robo, ambiente, tempo_apos_coleta), {
+        'passos': passos,
+        'recursos_coletados': robo.recursos_coletados,
+        'colisoes': robo.colisoes,
+        'distancia_percorrida': robo.distancia_percorrida,
+        'energia': robo.energia,
+        'meta_atingida': robo.meta_atingida,
+        'regra_parada': regra
+    }
+
+def avaliar_arvores(arvores, semente_ambiente, motor='compilado'):
+    """Avalia um par de árvores em um ambiente gerado a partir da semente.
+    
+    Função de nível de módulo para poder rodar em outros processos.
+    Retorna (fitness, estatísticas por tentativa, duração em segundos).
+    """
+    inicio = time.perf_counter()
+    random.seed(semente_ambiente)
+    ambiente = Ambiente()
+    robo = Robo(ambiente.largura // 2, ambiente.altura // 2)
+    individuo = IndividuoPG(arvores=arvores)
+    fitness, estatisticas = avaliar_individuo(individuo, ambiente, robo, SensoresIncrementais(robo, ambiente),
+                                              motor=motor)
+    return fitness, estatisticas, time.perf_counter() - inicio
+
+def avaliar_individuo(individuo, ambiente, robo, leitor_sensores, cache=None, politica=None, motor='compilado'):
+    """Média do fitness em TENTATIVAS simulações e estatísticas de cada uma"""
+    fitness = 0
+    estatisticas = []
+    for tentativa in range(TENTATIVAS):
+        contexto = {'fitness_acumulado': fitness, 'tentativas_restantes': TENTATIVAS - tentativa - 1}
+        fitness_tentativa, estatisticas_tentativa = simular_tentativa(
+            individuo, ambiente, robo, leitor_sensores, cache, politica, contexto, motor)
+        fitness += fitness_tentativa
+        estatisticas.append(estatisticas_tentativa)
+    return fitness / TENTATIVAS, estatisticas  # Média das tentativas
+
+class SelecaoTorneio:
+    """Torneio de tamanho fixo sobre o vetor de fitness.
+
+    Todos os torneios de uma geração são sorteados de uma vez (matriz de
+    índices); como em random.sample, um indivíduo não aparece duas vezes no
+    mesmo torneio, e empates ficam com o primeiro sorteado.
+    """
+
+    def __init__(self, tamanho=5):
+        self.tamanho = tamanho
+
+    def tamanho_torneio(self, geracao, n_geracoes):
+        return self.tamanho
+
+    def sortear(self, n_populacao, n, tamanho, rng):
+        # Matriz (n, tamanho) de índices, sem repetição dentro de cada linha
+        if tamanho > n_populacao // 2:
+            # Torneio grande em relação à população: o re-sorteio abaixo quase
+            # nunca acerta, então cada linha é uma permutação (chaves aleatórias)
+            return np.argsort(rng.random((n, n_populacao)), axis=1)[:, :tamanho]
+        torneios = rng.integers(0, n_populacao, (n, tamanho))
+        # Sorteia novamente as linhas com índices repetidos
+        while True:
+            ordenados = np.sort(torneios, axis=1)
+            repetidos = (ordenados[:, 1:] == ordenados[:, :-1]).any(axis=1)
+            if not repetidos.any():
+                return torneios
+            torneios[repetidos] = rng.integers(0, n_populacao, (int(repetidos.sum()), tamanho))
+
+    def escolher(self, fitness, n, rng, geracao=0, n_geracoes=1):
+        tamanho = min(self.tamanho_torneio(geracao, n_geracoes), len(fitness))
+        torneios = self.sortear(len(fitness), n, tamanho, rng)
+        vencedores = fitness[torneios].argmax(axis=1)
+        return torneios[np.arange(n), vencedores]
+
+class SelecaoTorneioDinamico(SelecaoTorneio):
+    # Tamanho do torneio cresce de 5 até 10 ao longo das gerações (README, item 9)
+    def __init__(self, minimo=3, maximo=10):
+        super().__init__()
+        self.minimo = minimo
+        self.maximo = maximo
+
+    def tamanho_torneio(self, geracao, n_geracoes):
+        return max(self.minimo, min(self.maximo, int(5 + (geracao / n_geracoes) * 5)))
+
+class SelecaoRanking:
+    # Probabilidade linear no posto: o pior tem peso 1, o melhor tem peso N
+    def escolher(self, fitness, n, rng, geracao=0, n_geracoes=1):
+        postos = np.empty(len(fitness))
+        postos[np.argsort(fitness, kind='stable')] = np.arange(1, len(fitness) + 1)
+        return rng.choice(len(fitness), size=n, p=postos / postos.sum())
+
+# ---------------------------------------------------------------------
+# Avaliação distribuída: protocolo coordenador/trabalhador sobre sockets
+# TCP ('tcp://host:porta') ou Unix ('unix:///caminho'). Cada mensagem é um
+# JSON precedido do seu tamanho (4 bytes, big-endian). As árvores viajam na
+# codificação compacta (codificar_arvore) em base64.
+# ---------------------------------------------------------------------
+
+def _abrir_socket(endereco, servidor=False):
+    if endereco.startswith('unix://'):
+        caminho = endereco[len('unix://'):]
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if servidor:
+            if os.path.exists(caminho):
+                os.remove(caminho)
+            sock.bind(caminho)
+        else:
+            sock.connect(caminho)
+    else:
+        host, porta = endereco[len('tcp://'):].rsplit(':', 1) if endereco.startswith('tcp://') \
+            else endereco.rsplit(':', 1)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if servidor:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((host, int(porta)))
+        else:
+            sock.connect((host, int(porta)))
+    if servidor:
+        sock.listen()
+    return sock
+
+def _receber_exato(sock, n):
+    dados = bytearray()
+    while len(dados) < n:
+        parte = sock.recv(n - len(dados))
+        if not parte:
+            raise ConnectionError("conexão encerrada")
+        dados += parte
+    return bytes(dados)
+
+def enviar_mensagem(sock, mensagem):
+    dados = json.dumps(mensagem).encode('utf-8')
+    sock.sendall(struct.pack('>I', len(dados)) + dados)
+
+def receber_mensagem(sock):
+    tamanho, = struct.unpack('>I', _receber_exato(sock, 4))
+    return json.loads(_receber_exato(sock, tamanho).decode('utf-8'))
+
+class Coordenador:
+    """Distribui avaliações entre trabalhadores conectados por socket.
+
+    Cada trabalhador recebe lotes de até tamanho_lote tarefas (árvores e
+    id do cenário). Um trabalhador que fica tempo_limite segundos sem
+    mandar batimento ou resultado, ou cuja conexão cai, é descartado e as
+    tarefas do seu lote voltam para o início da fila. Se avaliar passar
+    tempo_espera segundos sem nenhum trabalhador conectado (nenhum chegou
+    ou todos morreram), desiste com TimeoutError (None: espera para sempre).
+
+    O protocolo não tem autenticação nem criptografia: quem alcança o
+    endereço pode pedir lotes e mandar resultados. Fora de 127.0.0.1 ou de
+    um socket Unix, use apenas em rede confiável.
+    """
+
+    def __init__(self, endereco='tcp://127.0.0.1:5555', tamanho_lote=8, tempo_limite=10.0, tempo_espera=60.0):
+        self.endereco = endereco
+        self.tamanho_lote = tamanho_lote
+        self.tempo_limite = tempo_limite
+        self.tempo_espera = tempo_espera
+        self.condicao = threading.Condition()
+        self.fila = deque()
+        self.tarefas = {}  # id -> carga enviada ao trabalhador
+        self.resultados = {}  # id -> (fitness, estatísticas)
+        self.proxima_tarefa = 0
+        self.trabalhadores = {}  # nome -> tarefas concluídas
+        self.redespachadas = 0
+        self.ativo = True
+        self.servidor = _abrir_socket(endereco, servidor=True)
+        threading.Thread(target=self._aceitar, daemon=True).start()
+
+    def _aceitar(self):
+        while self.ativo:
+            try:
+                conexao, _ = self.servidor.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._atender, args=(conexao,), daemon=True).start()
+
+    def _atender(self, conexao):
+        conexao.settimeout(self.tempo_limite)
+        lote = []
+        nome = None
+        try:
+            nome = receber_mensagem(conexao).get('nome')
+            with self.condicao:
+                self.trabalhadores.setdefault(nome, 0)
+            while True:
+                with self.condicao:
+                    while self.ativo and not self.fila:
+                        self.condicao.wait()
+                    if not self.ativo:
+                        break
+                    lote = [self.fila.popleft() for _ in range(min(self.tamanho_lote, len(self.fila)))]
+                    carga = [dict(self.tarefas[id_tarefa], id=id_tarefa) for id_tarefa in lote]
+                enviar_mensagem(conexao, {'tipo': 'lote', 'tarefas': carga})
+                
+                # Batimentos renovam o tempo limite até chegar o resultado
+                mensagem = receber_mensagem(conexao)
+                while mensagem['tipo'] != 'resultado':
+                    mensagem = receber_mensagem(conexao)
+                
+                with self.condicao:
+                    for resultado in mensagem['resultados']:
+                        if resultado['id'] in self.tarefas:
+                            self.resultados[resultado['id']] = (resultado['fitness'], resultado['estatisticas'])
+                    self.trabalhadores[nome] += len(lote)
+                    lote = []
+                    self.condicao.notify_all()
+            enviar_mensagem(conexao, {'tipo': 'fim'})
+        except (OSError, ValueError):
+            pass  # Trabalhador morto ou sem resposta (socket.timeout é OSError)
+        finally:
+            with self.condicao:
+                pendentes = [id_tarefa for id_tarefa in lote if id_tarefa not in self.resultados]
+                if pendentes:
+                    self.fila.extendleft(reversed(pendentes))
+                    self.redespachadas += len(pendentes)
+                self.trabalhadores.pop(nome, None)
+                self.condicao.notify_all()
+            conexao.close()
+
+    def avaliar(self, itens):
+        """Avalia uma lista de (arvores, cenario); retorna (fitness, estatísticas)
+        na mesma ordem"""
+        with self.condicao:
+            ids = []
+            for arvores, cenario in itens:
+                id_tarefa = self.proxima_tarefa
+                self.proxima_tarefa += 1
+                self.tarefas[id_tarefa] = {
+                    'arvores': [base64.b64encode(codificar_arvore(a)).decode('ascii') for a in arvores],
+                    'cenario': cenario
+                }
+                self.fila.append(id_tarefa)
+                ids.append(id_tarefa)
+            self.condicao.notify_all()
+            
+            # Os trabalhadores avisam ao entregar resultados ou cair; o prazo
+            # só corre enquanto não há nenhum conectado
+            prazo = None
+            while not all(i in self.resultados for i in ids):
+                if self.trabalhadores or self.tempo_espera is None:
+                    prazo = None
+                elif prazo is None:
+                    prazo = time.monotonic() + self.tempo_espera
+                elif time.monotonic() >= prazo:
+                    for i in ids:
+                        self.tarefas.pop(i, None)
+                        self.resultados.pop(i, None)
+                    self.fila = deque(i for i in self.fila if i in self.tarefas)
+                    raise TimeoutError(f"Nenhum trabalhador conectado em {self.endereco} "
+                                       f"por {self.tempo_espera:.0f}s")
+                self.condicao.wait(None if prazo is None else max(0.0, prazo - time.monotonic()))
+            saida = [self.resultados.pop(i) for i in ids]
+            for i in ids:
+                del self.tarefas[i]
+        return saida
+
+    def fechar(self):
+        with self.condicao:
+            self.ativo = False
+            self.condicao.notify_all()
+        self.servidor.close()
+        if self.endereco.startswith('unix://') and os.path.exists(self.endereco[len('unix://'):]):
+            os.remove(self.endereco[len('unix://'):])
+
+def executar_trabalhador(endereco, nome=None, intervalo_batimento=2.0, tentativas_conexao=50):
+    """Laço de um trabalhador: recebe lotes, avalia com avaliar_arvores
+    (mesmo núcleo da avaliação local) e devolve fitness e estatísticas"""
+    for tentativa in range(tentativas_conexao):
+        try:
+            conexao = _abrir_socket(endereco)
+            break
+        except OSError:
+            if tentativa == tentativas_conexao - 1:
+                raise
+            time.sleep(0.2)
+    
+    trava = threading.Lock()
+    def enviar(mensagem):
+        with trava:
+            enviar_mensagem(conexao, mensagem)
+    
+    parar = threading.Event()
+    def batimentos():
+        while not parar.wait(intervalo_batimento):
+            try:
+                enviar({'tipo': 'batimento'})
+            except OSError:
+                break
+    
+    enviar({'tipo': 'ola', 'nome': nome or f"{socket.gethostname()}:{os.getpid()}"})
+    threading.Thread(target=batimentos, daemon=True).start()
+    try:
+        while True:
+            mensagem = receber_mensagem(conexao)
+            if mensagem['tipo'] == 'fim':
+                break
+            resultados = []
+            for tarefa in mensagem['tarefas']:
+                arvores = tuple(decodificar_arvore(base64.b64decode(a))[0] for a in tarefa['arvores'])
+                fitness, estatisticas, _ = avaliar_arvores(arvores, tarefa['cenario'])
+                resultados.append({'id': tarefa['id'], 'fitness': fitness, 'estatisticas': estatisticas})
+            enviar({'tipo': 'resultado', 'resultados': resultados})
+    except ConnectionError:
+        pass
+    finally:
+        parar.set()
+        conexao.close()
 
 class ProgramacaoGenetica:
-    def __init__(self, tamanho_populacao=50, profundidade=3):
+    def __init__(self, tamanho_populacao=50, profundidade=3, cache_semantico=None, substituto=None,
+                 politica_parada=None, selecao=None, fracao_elite=0.15,
+                 max_nos=None, max_profundidade=None, parcimonia=0.0, arquivo_populacao=None,
+                 inicializacao='aleatoria', sementes=None, fracao_sementes=0.25,
+                 avaliador_remoto=None, motor='compilado'):
+        if motor not in MOTORES:
+            raise ValueError(f"Motor desconhecido: {motor!r} (opções: {', '.join(MOTORES)})")
+        if max_nos is not None and max_nos < 2:
+            raise ValueError(f"max_nos deve ser pelo menos 2 (uma folha por árvore), recebido {max_nos}")
         self.tamanho_populacao = tamanho_populacao
         self.profundidade = profundidade
-        self.populacao = [IndividuoPG(profundidade) for _ in range(tamanho_populacao)]
+        self.populacao = self.criar_populacao_inicial(inicializacao, sementes, fracao_sementes)
         self.melhor_individuo = None
         self.melhor_fitness = float('-inf')
         self.historico_fitness = []
+        self.motor = motor
+        # Diversidade por geração, medida nas mesmas sondas fixas do início ao fim
+        self.sondas = vetorizar_sondas(gerar_sondas())
+        self.historico_diversidade = []
+        # Estratégia de seleção (SelecaoTorneio, SelecaoTorneioDinamico, SelecaoRanking)
+        self.selecao = selecao if selecao is not None else SelecaoTorneio(5)
+        self.fracao_elite = fracao_elite
+        self.rng = np.random.default_rng(random.getrandbits(64))
+        self.geracao = 0
+        self.n_geracoes = 1
+        # Controle de bloat: limites aplicados aos filhos e penalidade por nó
+        self.max_nos = max_nos
+        self.max_profundidade = max_profundidade
+        self.parcimonia = parcimonia
+        self.historico_tamanho = []
+        self.custo_avaliacao = {}
+        # Opcional: ArquivoPopulacao que guarda todo indivíduo avaliado
+        self.arquivo_populacao = arquivo_populacao
+        # Opcional: Coordenador que distribui as avaliações entre máquinas
+        # (cache semântico e regras de parada valem só para avaliação local)
+        self.avaliador_remoto = avaliador_remoto
+        # Opcional: CacheSemantico compartilhado por toda a população
+        self.cache_semantico = cache_semantico
+        self.historico_cache = []
+        # Opcional: ModeloSubstituto para triar filhos antes da simulação
+        self.substituto = substituto
+        self.historico_substituto = []
+        self.filhos_descartados = 0
+        # Opcional: PoliticaParada para encerrar cedo episódios sem futuro
+        self.politica_parada = politica_parada
+        self.historico_parada = []
+        self.passos_simulados = 0
+    
+    def criar_populacao_inicial(self, inicializacao='aleatoria', sementes=None, fracao_sementes=0.25):
+        # Sementes: fração da população vinda de indivíduos salvos, checkpoints
+        # ou arquivos de população; cópias repetidas de uma semente são mutadas
+        populacao = []
+        if sementes:
+            n_sementes = min(self.tamanho_populacao, int(round(self.tamanho_populacao * fracao_sementes)))
+            carregadas = carregar_sementes(sementes, n_sementes)
+            for semente in carregadas:
+                semente.profundidade = self.profundidade  # Usada nas mutações e filhos
+                # Ids e pais vêm do arquivo de origem; não valem no arquivo desta execução
+                semente.id = None
+                semente.pais = ()
+            for i in range(n_sementes if carregadas else 0):
+                semente = carregadas[i % len(carregadas)]
+                if i < len(carregadas):
+                    populacao.append(semente)
+                else:
+                    copia = semente.crossover(semente)
+                    copia.pais = ()
+                    copia.mutacao(probabilidade=0.1)
+                    populacao.append(copia)
+        
+        # Resto da população aleatório
+        n_aleatorios = self.tamanho_populacao - len(populacao)
+        if inicializacao == 'rampa':
+            populacao.extend(IndividuoPG.rampa(n_aleatorios, min(2, self.profundidade), self.profundidade))
+        elif inicializacao == 'aleatoria':
+            populacao.extend(IndividuoPG(self.profundidade) for _ in range(n_aleatorios))
+        else:
+            raise ValueError(f"Inicialização desconhecida: {inicializacao}")
+        return populacao
+    
+    def salvar_checkpoint(self, caminho):
+        # Grava a população atual em um novo ArquivoPopulacao
+        for arquivo in (caminho, caminho + '.idx'):
+            if os.path.exists(arquivo):
+                os.remove(arquivo)
+        checkpoint = ArquivoPopulacao(caminho)
+        try:
+            checkpoint.adicionar_populacao(self.populacao, self.geracao)
+        finally:
+            checkpoint.fechar()
     
     def avaliar_populacao(self):
         ambiente = Ambiente()
         robo = Robo(ambiente.largura // 2, ambiente.altura // 2)
+        leitor_sensores = SensoresIncrementais(robo, ambiente)
+        cache = self.cache_semantico
+        if cache is not None:
+            cache.zerar_estatisticas()
+            cache.esquecer_nos()  # Libera as árvores das gerações anteriores
         
-        for individuo in self.populacao:
-            fitness = 0
-            
-            # Simular 5 tentativas
-            for _ in range(5):
-                ambiente.reset()
-                robo.reset(ambiente.largura // 2, ambiente.altura // 2)
-                ultima_distancia_recurso = float('inf')
-                ultima_distancia_meta = float('inf')
-                tempo_sem_progresso = 0
-                recursos_coletados_anterior = 0
-                tempo_apos_coleta = 0
-                
-                while True:
-                    # Obter sensores
-                    sensores = robo.get_sensores(ambiente)
-                    sensores['total_recursos'] = len(ambiente.recursos)
-                    
-                    # Avaliar árvores de decisão
-                    aceleracao = individuo.avaliar(sensores, 'aceleracao')
-                    rotacao = individuo.avaliar(sensores, 'rotacao')
-                    
-                    # Limitar valores
-                    aceleracao = max(-1, min(1, aceleracao))
-                    rotacao = max(-0.5, min(0.5, rotacao))
-                    
-                    # Mover robô
-                    sem_energia = robo.mover(aceleracao, rotacao, ambiente)
-                    
-                    # Verificar progresso
-                    nova_distancia_recurso = sensores.get('dist_recurso', float('inf'))
-                    nova_distancia_meta = sensores.get('dist_meta', float('inf'))
-                    
-                    # Verificar progresso na coleta
-                    if robo.recursos_coletados > recursos_coletados_anterior:
-                        recursos_coletados_anterior = robo.recursos_coletados
-                        tempo_sem_progresso = 0
-                        tempo_apos_coleta = 0
-                    # Verificar progresso em direção à meta após coleta completa
-                    elif robo.recursos_coletados == len(ambiente.recursos):
-                        tempo_apos_coleta += 1
-                        if nova_distancia_meta < ultima_distancia_meta:
-                            tempo_sem_progresso = 0
-                        else:
-                            tempo_sem_progresso += 1
-                    # Verificar progresso em direção ao recurso
-                    elif nova_distancia_recurso < ultima_distancia_recurso:
-                        tempo_sem_progresso = 0
-                    else:
-                        tempo_sem_progresso += 1
-                    
-                    ultima_distancia_recurso = nova_distancia_recurso
-                    ultima_distancia_meta = nova_distancia_meta
-                    
-                    # Verificar fim da simulação
-                    if sem_energia or ambiente.passo() or tempo_sem_progresso > 50 or (tempo_apos_coleta > 100 and robo.recursos_coletados == len(ambiente.recursos)):
-                        break
-                
-                # Calcular fitness 
-                fitness_tentativa = (
-                    robo.recursos_coletados * 300 +  # Aumentado de 100 para 300
-                    robo.distancia_percorrida * 0.2 +  # Aumentado de 0.1 para 0.2
-                    (1000 - robo.tempo_parado) * 0.5 +  # Novo: penalidade por ficar parado
-                    robo.energia * 0.3 +  # Novo: bônus por manter energia
-                    (1000 - robo.colisoes * 30) +  # Reduzido de 50 para 30
-                    (5000 if robo.meta_atingida else 0)  # Aumentado de 500 para 5000
-                )
-                
-                # Penalidades adicionais
-                if robo.recursos_coletados == 0:
-                    fitness_tentativa *= 0.3  # Penalidade maior por não coletar recursos
-                elif robo.recursos_coletados < len(ambiente.recursos) and robo.meta_atingida:
-                    fitness_tentativa *= 0.5  # Penalidade por ir para meta sem coletar tudo
-                elif robo.recursos_coletados == len(ambiente.recursos) and not robo.meta_atingida:
-                    fitness_tentativa *= 0.5  # Penalidade maior por não ir para meta após coletar tudo
-                    # Penalidade adicional baseada no tempo após coleta
-                    fitness_tentativa *= max(0.5, 1 - (tempo_apos_coleta / 100))
-                
-                fitness += max(0, fitness_tentativa)
+        politica = self.politica_parada
+        if politica is not None:
+            politica.zerar_estatisticas()
+        self.passos_simulados = 0
+        tamanhos = []
+        custo_total = 0
+        
+        # Avaliação distribuída: todos no mesmo cenário, gerado pela semente
+        if self.avaliador_remoto is not None:
+            cenario = random.getrandbits(32)
+            resultados = self.avaliador_remoto.avaliar(
+                [((i.arvore_aceleracao, i.arvore_rotacao), cenario) for i in self.populacao])
+        
+        for posicao, individuo in enumerate(self.populacao):
+            if self.avaliador_remoto is not None:
+                individuo.fitness, estatisticas = resultados[posicao]
+            else:
+                individuo.fitness, estatisticas = avaliar_individuo(
+                    individuo, ambiente, robo, leitor_sensores, cache, politica, self.motor)
+            passos = sum(e['passos'] for e in estatisticas)
+            self.passos_simulados += passos
             
-            individuo.fitness = fitness / 5  # Média das 5 tentativas
+            tamanhos.append(individuo.tamanho())
+            custo_total += self.nos_por_passo(individuo) * passos
+            if self.parcimonia:
+                individuo.fitness -= self.parcimonia * tamanhos[-1]
             
             # Atualizar melhor indivíduo
             if individuo.fitness > self.melhor_fitness:
                 self.melhor_fitness = individuo.fitness
                 self.melhor_individuo = individuo
+        
+        self.resumir_custo(tamanhos, custo_total)
+    
+    def nos_por_passo(self, individuo):
+        # Custo de avaliação: nós calculados por passo (únicos no motor
+        # compilado, todos no interpretador)
+        return individuo.tamanho() if self.motor == 'escalar' else individuo.compilar().nos_unicos
+    
+    def resumir_custo(self, tamanhos, custo_total):
+        self.custo_avaliacao = {
+            'tamanho_medio': float(np.mean(tamanhos)),
+            'tamanho_maximo': int(np.max(tamanhos)),
+            'profundidade_maxima': max(i.profundidade_maxima() for i in self.populacao),
+            'custo_total': custo_total,
+            'custo_por_passo': custo_total / max(1, self.passos_simulados)
+        }
+    
+    def vetor_fitness(self):
+        return np.fromiter((individuo.fitness for individuo in self.populacao), dtype=float,
+                           count=len(self.populacao))
     
     def selecionar(self):
-        # Seleção por torneio com tamanho variável
-        tamanho_torneio = 5
-        selecionados = []
+        fitness = self.vetor_fitness()
         
         # Manter os 15% melhores indivíduos
-        n_elite = max(1, int(self.tamanho_populacao * 0.15))
-        elite = sorted(self.populacao, key=lambda x: x.fitness, reverse=True)[:n_elite]
-        selecionados.extend(elite)
+        n_elite = min(len(fitness), max(1, int(self.tamanho_populacao * self.fracao_elite)))
+        elite = np.argpartition(-fitness, n_elite - 1)[:n_elite]
+        elite = elite[np.argsort(-fitness[elite], kind='stable')]
         
-        # Selecionar o resto por torneio
-        while len(selecionados) < self.tamanho_populacao:
-            torneio = random.sample(self.populacao, tamanho_torneio)
-            vencedor = max(torneio, key=lambda x: x.fitness)
-            selecionados.append(vencedor)
+        # Selecionar o resto com a estratégia configurada
+        n_restantes = max(0, self.tamanho_populacao - n_elite)
+        escolhidos = self.selecao.escolher(fitness, n_restantes, self.rng, self.geracao, self.n_geracoes)
         
-        return selecionados
+        return [self.populacao[i] for i in np.concatenate([elite, escolhidos])]
     
-    def evoluir(self, n_geracoes=50):
+    def sortear_pares(self, n_pares, n_selecionados):
+        # Pares de pais distintos para toda a geração, como random.sample(selecionados, 2)
+        pais1 = self.rng.integers(0, n_selecionados, n_pares)
+        pais2 = self.rng.integers(0, n_selecionados - 1, n_pares)
+        pais2 += pais2 >= pais1
+        return zip(pais1.tolist(), pais2.tolist())
+    
+    def evoluir(self, n_geracoes=50, tempo_maximo=None):
+        # tempo_maximo (segundos): não inicia novas gerações depois de esgotado
+        self.n_geracoes = n_geracoes
+        inicio = time.perf_counter()
         for geracao in range(n_geracoes):
+            if tempo_maximo is not None and time.perf_counter() - inicio > tempo_maximo:
+                print(f"Tempo máximo de {tempo_maximo:.0f}s esgotado após {geracao} gerações")
+                break
+            self.geracao = geracao
             print(f"Geração {geracao + 1}/{n_geracoes}")
             
             # Avaliar população
             self.avaliar_populacao()
             
+            if self.arquivo_populacao is not None:
+                self.arquivo_populacao.adicionar_populacao(self.populacao, geracao)
+            
             # Registrar melhor fitness
             self.historico_fitness.append(self.melhor_fitness)
             print(f"Melhor fitness: {self.melhor_fitness:.2f}")
+            self.registrar_diversidade()
+            self.registrar_custo()
+            if self.cache_semantico is not None:
+                estatisticas = self.cache_semantico.estatisticas()
+                self.historico_cache.append(estatisticas)
+                print(f"Cache semântico: {estatisticas['taxa_acerto']:.1%} de acertos "
+                      f"em {estatisticas['consultas']} consultas")
+            if self.politica_parada is not None:
+                estatisticas = self.politica_parada.estatisticas()
+                economizados = sum(e['passos_economizados'] for e in estatisticas.values())
+                self.historico_parada.append({'passos_simulados': self.passos_simulados, 'regras': estatisticas})
+                print(f"Parada antecipada: pelo menos {economizados} passos evitados, "
+                      f"{self.passos_simulados} simulados")
+                self.politica_parada.atualizar_geracao([i.fitness for i in self.populacao])
+            if self.substituto is not None:
+                precisao = self.substituto.registrar(self.populacao)
+                if precisao is not None:
+                    # TENTATIVAS simulações por filho descartado na triagem
+                    precisao['simulacoes_evitadas'] = self.filhos_descartados * TENTATIVAS
+                    self.historico_substituto.append(precisao)
+                    print(f"Substituto: correlação {precisao['correlacao']:.2f}, "
+                          f"{precisao['simulacoes_evitadas']} simulações evitadas")
             
             # Selecionar indivíduos
             selecionados = self.selecionar()
@@ -903,52 +2625,597 @@ class ProgramacaoGenetica:
             nova_populacao.append(self.melhor_individuo)
             
             # Preencher o resto da população
-            while len(nova_populacao) < self.tamanho_populacao:
-                pai1, pai2 = random.sample(selecionados, 2)
-                filho = pai1.crossover(pai2)
-                filho.mutacao(probabilidade=0.2)  # Aumentada probabilidade de mutação
-                nova_populacao.append(filho)
+            n_filhos = self.tamanho_populacao - len(nova_populacao)
+            n_gerados = n_filhos * (self.substituto.fator_excesso if self.substituto is not None else 1)
+            filhos = []
+            for i, j in self.sortear_pares(n_gerados, len(selecionados)):
+                filhos.append(self.gerar_filho(selecionados[i], selecionados[j]))
+            if self.substituto is not None:
+                filhos = self.substituto.triar(filhos, n_filhos)
+            self.filhos_descartados = n_gerados - len(filhos)
+            nova_populacao.extend(filhos)
             
             self.populacao = nova_populacao
         
         return self.melhor_individuo, self.historico_fitness
+    
+    def registrar_diversidade(self):
+        diversidade = medir_diversidade(self.populacao, self.sondas)
+        self.historico_diversidade.append(diversidade)
+        print(f"Diversidade: {diversidade['estruturas_unicas']} estruturas únicas, "
+              f"{diversidade['comportamentos_unicos']} comportamentos, "
+              f"entropia das raízes {diversidade['entropia_operadores']:.2f} bits")
+        return diversidade
+    
+    def registrar_custo(self):
+        self.historico_tamanho.append(self.custo_avaliacao)
+        print(f"Tamanho médio: {self.custo_avaliacao['tamanho_medio']:.1f} nós "
+              f"(máximo {self.custo_avaliacao['tamanho_maximo']}), "
+              f"custo por passo: {self.custo_avaliacao['custo_por_passo']:.1f} nós")
+    
+    def gerar_filho(self, pai1, pai2):
+        filho = pai1.crossover(pai2)
+        filho.mutacao(probabilidade=0.2)  # Aumentada probabilidade de mutação
+        if self.max_nos is not None or self.max_profundidade is not None:
+            filho.limitar(self.max_nos, self.max_profundidade)
+        return filho
+    
+    def evoluir_assincrono(self, n_avaliacoes=5000, n_processos=None, insercao='pior',
+                           tamanho_torneio_insercao=5, avaliacoes_por_ambiente=None, tempo_maximo=None,
+                           reavaliar=False):
+        """Evolução em regime estacionário, sem barreira entre gerações.
+        
+        Cada processo recebe um filho assim que termina o anterior; o
+        resultado entra na população substituindo o pior indivíduo
+        (insercao='pior') ou o pior de um torneio (insercao='torneio'), se
+        for melhor que ele. O ambiente muda a cada avaliacoes_por_ambiente
+        filhos (padrão: tamanho da população). Sem reavaliar, quem já está
+        na população mantém o fitness medido no ambiente em que foi
+        avaliado, e os filhos disputam a vaga contra esse valor antigo; com
+        reavaliar=True, a cada troca de ambiente os sobreviventes são
+        avaliados de novo no ambiente novo antes dos próximos filhos (as
+        reavaliações contam no orçamento n_avaliacoes).
+        
+        Cada tamanho_populacao avaliações formam uma pseudo-geração: nela
+        são registrados o histórico de fitness, a diversidade e o custo
+        (historico_tamanho), e é ela que a seleção recebe como geração
+        atual. A parcimônia é aplicada como em evoluir. Cache semântico,
+        substituto e regras de parada não são usados neste modo. Com
+        tempo_maximo (segundos), nenhum filho novo é enviado depois de
+        esgotado o tempo; as avaliações pendentes e as da população
+        inicial sempre terminam.
+        """
+        n_processos = n_processos or os.cpu_count() or 1
+        avaliacoes_por_ambiente = avaliacoes_por_ambiente or self.tamanho_populacao
+        semente_base = random.getrandbits(32)
+        self.geracao = 0
+        self.n_geracoes = max(1, n_avaliacoes // self.tamanho_populacao)
+        
+        a_avaliar = list(self.populacao)  # População inicial ainda sem fitness
+        a_reavaliar = []
+        self.populacao = []
+        pendentes = {}
+        enviados = 0
+        novos = 0  # Avaliações que não são reavaliações; definem o ambiente
+        concluidos = 0
+        tempo_ocupado = 0.0
+        # Custo da pseudo-geração corrente
+        tamanhos = []
+        custo_total = 0
+        self.passos_simulados = 0
+        inicio = time.perf_counter()
+        
+        with ProcessPoolExecutor(max_workers=n_processos) as executor:
+            while True:
+                # A população inicial é sempre avaliada por completo; o
+                # orçamento (n_avaliacoes, tempo_maximo) limita só os filhos
+                # e as reavaliações
+                esgotado = enviados >= n_avaliacoes or (
+                    tempo_maximo is not None and time.perf_counter() - inicio > tempo_maximo)
+                # Mantém todos os processos ocupados (com folga de uma tarefa cada)
+                while len(pendentes) < 2 * n_processos:
+                    reavaliacao = False
+                    if a_avaliar:
+                        individuo = a_avaliar.pop()
+                    elif a_reavaliar and not esgotado:
+                        individuo = a_reavaliar.pop()
+                        reavaliacao = True
+                    elif not esgotado and len(self.populacao) >= 2:
+                        individuo = self.gerar_filho(*self.escolher_pais())
+                    else:
+                        break
+                    semente = semente_base + novos // avaliacoes_por_ambiente
+                    arvores = (individuo.arvore_aceleracao, individuo.arvore_rotacao)
+                    futuro = executor.submit(avaliar_arvores, arvores, semente, self.motor)
+                    pendentes[futuro] = (individuo, reavaliacao)
+                    enviados += 1
+                    if not reavaliacao:
+                        novos += 1
+                        if reavaliar and novos % avaliacoes_por_ambiente == 0:
+                            # Próximas avaliações já usam o ambiente novo
+                            a_reavaliar = list(self.populacao)
+                    esgotado = esgotado or enviados >= n_avaliacoes
+                if not pendentes:
+                    break
+                
+                prontos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    individuo, reavaliacao = pendentes.pop(futuro)
+                    individuo.fitness, estatisticas, duracao = futuro.result()
+                    tempo_ocupado += duracao
+                    concluidos += 1
+                    passos = sum(e['passos'] for e in estatisticas)
+                    self.passos_simulados += passos
+                    tamanhos.append(individuo.tamanho())
+                    custo_total += self.nos_por_passo(individuo) * passos
+                    if self.parcimonia:
+                        individuo.fitness -= self.parcimonia * tamanhos[-1]
+                    # Reavaliado já está na população (se ainda não foi substituído)
+                    if not reavaliacao:
+                        self.inserir(individuo, insercao, tamanho_torneio_insercao)
+                    if self.arquivo_populacao is not None:
+                        self.arquivo_populacao.adicionar(individuo, self.geracao)
+                    
+                    if individuo.fitness > self.melhor_fitness:
+                        self.melhor_fitness = individuo.fitness
+                        self.melhor_individuo = individuo
+                    if concluidos % self.tamanho_populacao == 0:
+                        self.historico_fitness.append(self.melhor_fitness)
+                        print(f"Avaliações {concluidos}/{n_avaliacoes} - melhor fitness: {self.melhor_fitness:.2f}")
+                        self.registrar_diversidade()
+                        self.resumir_custo(tamanhos, custo_total)
+                        self.registrar_custo()
+                        tamanhos = []
+                        custo_total = 0
+                        self.passos_simulados = 0
+                        self.geracao = min(concluidos // self.tamanho_populacao, self.n_geracoes - 1)
+        
+        duracao_total = time.perf_counter() - inicio
+        self.utilizacao = tempo_ocupado / (n_processos * duracao_total) if duracao_total > 0 else 0.0
+        print(f"Utilização dos processos: {self.utilizacao:.1%}")
+        return self.melhor_individuo, self.historico_fitness
+    
+    def escolher_pais(self):
+        # Dois pais distintos; o segundo é escolhido entre os demais
+        fitness = self.vetor_fitness()
+        primeiro = int(self.selecao.escolher(fitness, 1, self.rng, self.geracao, self.n_geracoes)[0])
+        segundo = int(self.selecao.escolher(np.delete(fitness, primeiro), 1, self.rng,
+                                            self.geracao, self.n_geracoes)[0])
+        segundo += segundo >= primeiro
+        return self.populacao[primeiro], self.populacao[segundo]
+    
+    def inserir(self, individuo, insercao='pior', tamanho_torneio=5):
+        # Inserção em regime estacionário
+        if len(self.populacao) < self.tamanho_populacao:
+            self.populacao.append(individuo)
+            return
+        fitness = self.vetor_fitness()
+        if insercao == 'pior':
+            alvo = int(np.argmin(fitness))
+        elif insercao == 'torneio':
+            torneio = self.rng.choice(len(fitness), size=min(tamanho_torneio, len(fitness)), replace=False)
+            alvo = int(torneio[np.argmin(fitness[torneio])])
+        else:
+            raise ValueError(f"Inserção desconhecida: {insercao}")
+        if individuo.fitness > fitness[alvo]:
+            self.populacao[alvo] = individuo
 
 # =====================================================================
 # PARTE 3: EXECUÇÃO DO PROGRAMA (PARA O ALUNO MODIFICAR)
 # Esta parte contém a execução do programa e os parâmetros finais.
 # =====================================================================
 
-# Executando o algoritmo
-if __name__ == "__main__":
-    print("Iniciando simulação de robô com programação genética...")
+# Perfis de configuração da linha de comando. Um arquivo JSON (--config) pode
+# trazer um único perfil ou vários em {"perfis": {nome: {...}}}; cada perfil
+# herda de 'padrao', ou do perfil indicado em "herda", as chaves que omitir.
+# PARÂMETROS PARA O ALUNO MODIFICAR
+PERFIS = {
+    'padrao': {
+        'populacao': 400,
+        'profundidade': 5,
+        'inicializacao': 'aleatoria',  # 'aleatoria' ou 'rampa'
+        'sementes': [],  # Indivíduos, checkpoints ou arquivos de população
+        'motor': 'compilado',  # 'escalar' ou 'compilado' (sem 'vetorizado'; ver MOTORES)
+        'semente': None,  # Semente do random/numpy (None: aleatória)
+        # Orçamento
+        'geracoes': 15,
+        'avaliacoes': None,  # Modo assíncrono (padrão: populacao * geracoes)
+        'tempo_maximo': None,  # Segundos
+        # Paralelismo: processos locais (número ou 'auto') ativam a evolução
+        # assíncrona; coordenador distribui cada geração entre trabalhadores
+        'processos': None,
+        'reavaliar': False,  # Modo assíncrono: reavalia a população a cada ambiente novo
+        'coordenador': None,
+        # Aceleração e controle de bloat
+        'cache_semantico': False,
+        'substituto': False,
+        'parada_antecipada': False,
+        'max_nos': None,
+        'max_profundidade': None,
+        'parcimonia': 0.0,
+        # Cenários de avaliar/reproduzir (sementes do ambiente)
+        'cenario_inicial': 0,
+        'n_cenarios': 10,
+        # Saídas (None desativa)
+        'saida_individuo': 'melhor_robo.json',
+        'saida_grafico': 'evolucao_fitness_robo.png',
+        'saida_historico': None,
+        'arquivo_populacao': None,
+        'checkpoint': None,
+    },
+    'rapido': {'populacao': 50, 'profundidade': 3, 'geracoes': 5},
+    'paralelo': {'processos': 'auto', 'inicializacao': 'rampa', 'max_nos': 60,
+                 'saida_historico': 'historico_robo.json'},
+    # O coordenador escuta só na máquina local; para receber trabalhadores de
+    # outras máquinas (protocolo sem autenticação, apenas em rede confiável):
+    # --definir coordenador=tcp://0.0.0.0:5555
+    'cluster': {'coordenador': 'tcp://127.0.0.1:5555', 'inicializacao': 'rampa', 'max_nos': 60,
+                'saida_grafico': None, 'saida_historico': 'historico_robo.json',
+                'arquivo_populacao': 'populacao_robo.pga', 'checkpoint': 'checkpoint_robo.pga'},
+}
+
+def _resolver_perfil(perfis, nome, cadeia=()):
+    if nome not in perfis:
+        raise ValueError(f"Perfil desconhecido: {nome!r} (disponíveis: {', '.join(sorted(perfis))})")
+    if nome in cadeia:
+        raise ValueError(f"Herança circular entre perfis: {' -> '.join(cadeia + (nome,))}")
+    perfil = dict(perfis[nome])
+    base = perfil.pop('herda', None if nome == 'padrao' else 'padrao')
+    configuracao = _resolver_perfil(perfis, base, cadeia + (nome,)) if base else dict(PERFIS['padrao'])
+    configuracao.update(perfil)
+    return configuracao
+
+def carregar_configuracao(caminho=None, perfil=None, definicoes=()):
+    """Monta a configuração a partir dos perfis embutidos, do arquivo JSON
+    opcional e de definições 'chave=valor' (valor em JSON ou texto)"""
+    perfis = dict(PERFIS)
+    if caminho is not None:
+        with open(caminho, 'r') as f:
+            dados = json.load(f)
+        if 'perfis' in dados:
+            perfis.update(dados['perfis'])
+            perfil = perfil or dados.get('perfil')
+        else:
+            perfis[caminho] = dados
+            perfil = perfil or caminho
+    configuracao = _resolver_perfil(perfis, perfil or 'padrao')
     
-    # Criar e treinar o algoritmo genético
-    print("Treinando o algoritmo genético...")
-    # PARÂMETROS PARA O ALUNO MODIFICAR
-    pg = ProgramacaoGenetica(tamanho_populacao=400, profundidade=5)
-    melhor_individuo, historico = pg.evoluir(n_geracoes=15)
+    for definicao in definicoes:
+        chave, separador, valor = definicao.partition('=')
+        if not separador:
+            raise ValueError(f"Definição inválida: {definicao!r} (use chave=valor)")
+        try:
+            valor = json.loads(valor)
+        except ValueError:
+            pass  # Texto simples, como em --definir motor=escalar
+        configuracao[chave.strip()] = valor
     
-    # Salvar o melhor indivíduo
-    print("Salvando o melhor indivíduo...")
-    melhor_individuo.salvar('melhor_robo.json')
+    desconhecidas = set(configuracao) - set(PERFIS['padrao'])
+    if desconhecidas:
+        raise ValueError(f"Chaves de configuração desconhecidas: {', '.join(sorted(desconhecidas))}")
+    if configuracao['motor'] == 'vetorizado':
+        raise ValueError("Motor 'vetorizado' não existe: a simulação avalia um passo por vez; "
+                         "a avaliação vetorizada só é usada nas sondas de diversidade. Use 'compilado'")
+    if configuracao['motor'] not in MOTORES:
+        raise ValueError(f"Motor desconhecido: {configuracao['motor']!r} (opções: {', '.join(MOTORES)})")
+    if configuracao['processos'] is not None and configuracao['coordenador'] is not None:
+        # A evolução assíncrona usa só processos locais
+        raise ValueError("Use 'processos' ou 'coordenador', não os dois")
+    return configuracao
+
+def tem_tela():
+    # Sem DISPLAY (execução em lote), nenhuma janela é aberta
+    if os.name == 'nt' or sys.platform == 'darwin':
+        return True
+    return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+def carregar_controlador(caminho, id_individuo=None):
+    # Indivíduo salvo em JSON, ou o melhor (ou o id) de um arquivo de população
+    if id_individuo is not None:
+        return IndividuoPG.carregar(caminho, id_individuo)
+    controladores = carregar_sementes([caminho], 1)
+    if not controladores:
+        raise ValueError(f"Nenhum indivíduo em {caminho}")
+    return controladores[0]
+
+def salvar_json(dados, caminho):
+    with open(caminho, 'w') as f:
+        json.dump(dados, f, indent=2, default=float)
+    print(f"Gravado: {caminho}")
+
+def comando_treinar(configuracao, mostrar=False):
+    c = configuracao
+    if c['semente'] is not None:
+        random.seed(c['semente'])
+        np.random.seed(c['semente'] % 2**32)
+    arquivo = ArquivoPopulacao(c['arquivo_populacao']) if c['arquivo_populacao'] else None
+    coordenador = Coordenador(c['coordenador']) if c['coordenador'] else None
+    
+    try:
+        print("Treinando o algoritmo genético...")
+        pg = ProgramacaoGenetica(
+            tamanho_populacao=c['populacao'], profundidade=c['profundidade'],
+            cache_semantico=CacheSemantico() if c['cache_semantico'] else None,
+            substituto=ModeloSubstituto() if c['substituto'] else None,
+            politica_parada=PoliticaParada() if c['parada_antecipada'] else None,
+            max_nos=c['max_nos'], max_profundidade=c['max_profundidade'], parcimonia=c['parcimonia'],
+            arquivo_populacao=arquivo, inicializacao=c['inicializacao'], sementes=c['sementes'] or None,
+            avaliador_remoto=coordenador, motor=c['motor'])
+        if c['processos'] is not None:
+            n_processos = None if c['processos'] == 'auto' else int(c['processos'])
+            n_avaliacoes = c['avaliacoes'] or c['populacao'] * c['geracoes']
+            melhor_individuo, historico = pg.evoluir_assincrono(
+                n_avaliacoes, n_processos, tempo_maximo=c['tempo_maximo'], reavaliar=c['reavaliar'])
+        else:
+            melhor_individuo, historico = pg.evoluir(c['geracoes'], c['tempo_maximo'])
+    finally:
+        if coordenador is not None:
+            coordenador.fechar()
+        if arquivo is not None:
+            arquivo.fechar()
+    
+    if melhor_individuo is None:
+        print("Erro: nenhum indivíduo foi avaliado (orçamento esgotado antes da primeira geração)",
+              file=sys.stderr)
+        return 1
+    
+    # Salvar o melhor indivíduo, o histórico e a população final
+    if c['saida_individuo']:
+        melhor_individuo.salvar(c['saida_individuo'])
+        print(f"Gravado: {c['saida_individuo']}")
+    if c['checkpoint']:
+        pg.salvar_checkpoint(c['checkpoint'])
+        print(f"Gravado: {c['checkpoint']}")
+    if c['saida_historico']:
+        salvar_json({
+            'configuracao': c,
+            'melhor_fitness': pg.melhor_fitness,
+            'fitness': historico,
+            'diversidade': pg.historico_diversidade,
+            'tamanho': pg.historico_tamanho,
+            'cache': pg.historico_cache,
+            'substituto': pg.historico_substituto,
+            'parada': pg.historico_parada,
+        }, c['saida_historico'])
     
     # Plotar evolução do fitness
-    print("Plotando evolução do fitness...")
-    plt.figure(figsize=(10, 5))
-    plt.plot(historico)
-    plt.title('Evolução do Fitness')
-    plt.xlabel('Geração')
-    plt.ylabel('Fitness')
-    plt.savefig('evolucao_fitness_robo.png')
-    plt.close()
-    
-    # Simular o melhor indivíduo
-    print("Simulando o melhor indivíduo...")
+    if c['saida_grafico']:
+        plt.figure(figsize=(10, 5))
+        plt.plot(historico)
+        plt.title('Evolução do Fitness')
+        plt.xlabel('Geração')
+        plt.ylabel('Fitness')
+        plt.savefig(c['saida_grafico'])
+        plt.close()
+        print(f"Gravado: {c['saida_grafico']}")
+    
+    if mostrar:
+        print("Executando simulação em tempo real...")
+        print("Pressione Ctrl+C para fechar a janela quando desejar.")
+        ambiente = Ambiente()
+        robo = Robo(ambiente.largura // 2, ambiente.altura // 2)
+        Simulador(ambiente, robo, melhor_individuo).simular()
+    return 0
+
+def comando_avaliar(configuracao, caminho, id_individuo=None, saida=None):
+    # Fitness do controlador em n_cenarios ambientes gerados por semente
+    individuo = carregar_controlador(caminho, id_individuo)
+    arvores = (individuo.arvore_aceleracao, individuo.arvore_rotacao)
+    inicial = configuracao['cenario_inicial']
+    resultados = []
+    for cenario in range(inicial, inicial + configuracao['n_cenarios']):
+        fitness, estatisticas, duracao = avaliar_arvores(arvores, cenario, configuracao['motor'])
+        resultados.append({
+            'cenario': cenario,
+            'fitness': fitness,
+            'recursos_coletados': float(np.mean([e['recursos_coletados'] for e in estatisticas])),
+            'meta_atingida': float(np.mean([e['meta_atingida'] for e in estatisticas])),
+            'colisoes': float(np.mean([e['colisoes'] for e in estatisticas])),
+            'passos': sum(e['passos'] for e in estatisticas),
+            'duracao': duracao
+        })
+        print(f"Cenário {cenario}: fitness {fitness:.2f}, "
+              f"{resultados[-1]['recursos_coletados']:.1f} recursos, "
+              f"meta {resultados[-1]['meta_atingida']:.0%}")
+    
+    fitness = np.array([r['fitness'] for r in resultados])
+    resumo = {'media': float(fitness.mean()), 'desvio': float(fitness.std()),
+              'minimo': float(fitness.min()), 'maximo': float(fitness.max())}
+    print(f"Fitness em {len(fitness)} cenários: {resumo['media']:.2f} ± {resumo['desvio']:.2f} "
+          f"(mínimo {resumo['minimo']:.2f}, máximo {resumo['maximo']:.2f})")
+    if saida:
+        salvar_json({'controlador': caminho, 'resumo': resumo, 'cenarios': resultados}, saida)
+    return 0
+
+def comando_benchmark(configuracao, n_individuos=50, saida=None):
+    # Mesma população, mesmo ambiente e mesma semente por indivíduo para
+    # cada motor (Robo.mover usa random), então o fitness deve coincidir
+    semente = configuracao['semente'] if configuracao['semente'] is not None else 0
+    random.seed(semente)
+    populacao = [IndividuoPG(configuracao['profundidade']) for _ in range(n_individuos)]
+    ambiente = Ambiente()
+    robo = Robo(ambiente.largura // 2, ambiente.altura // 2)
+    leitor_sensores = SensoresIncrementais(robo, ambiente)
+    
+    resultados = {}
+    fitness_por_motor = {}
+    for motor in MOTORES:
+        inicio = time.perf_counter()
+        fitness = []
+        passos = 0
+        for posicao, individuo in enumerate(populacao):
+            random.seed(semente + posicao)
+            valor, estatisticas = avaliar_individuo(individuo, ambiente, robo, leitor_sensores, motor=motor)
+            fitness.append(valor)
+            passos += sum(e['passos'] for e in estatisticas)
+        duracao = time.perf_counter() - inicio
+        fitness_por_motor[motor] = fitness
+        resultados[motor] = {'segundos': duracao, 'passos': passos,
+                             'passos_por_segundo': passos / duracao,
+                             'individuos_por_segundo': n_individuos / duracao}
+        print(f"{motor:>11}: {duracao:.2f}s, {passos / duracao:,.0f} passos/s, "
+              f"{n_individuos / duracao:.1f} indivíduos/s")
+    
+    sondas = vetorizar_sondas(gerar_sondas())
+    inicio = time.perf_counter()
+    medir_diversidade(populacao, sondas)
+    resultados['diversidade'] = {'segundos': time.perf_counter() - inicio}
+    print(f"{'diversidade':>10}: {resultados['diversidade']['segundos']:.3f}s")
+    
+    iguais = all(f == fitness_por_motor[MOTORES[0]] for f in fitness_por_motor.values())
+    print(f"Fitness idêntico entre motores: {'sim' if iguais else 'NÃO'}")
+    if saida:
+        salvar_json({'individuos': n_individuos, 'profundidade': configuracao['profundidade'],
+                     'fitness_identico': iguais, 'resultados': resultados}, saida)
+    return 0 if iguais else 1
+
+def desenhar_trajetoria(ambiente, trajetoria, caminho):
+    fig, ax = plt.subplots(figsize=(12, 8))
+    ax.set_xlim(0, ambiente.largura)
+    ax.set_ylim(0, ambiente.altura)
+    ax.set_title("Trajetória do Robô", fontsize=14)
+    ax.grid(True, linestyle='--', alpha=0.7)
+    for obstaculo in ambiente.obstaculos:
+        ax.add_patch(patches.Rectangle((obstaculo['x'], obstaculo['y']), obstaculo['largura'],
+                                       obstaculo['altura'], edgecolor='black', facecolor='#FF9999', alpha=0.7))
+    for recurso in ambiente.recursos:
+        ax.add_patch(patches.Circle((recurso['x'], recurso['y']), 10, edgecolor='black',
+                                    facecolor='#99FF99', alpha=0.3 if recurso['coletado'] else 0.8))
+    ax.add_patch(patches.Circle((ambiente.meta['x'], ambiente.meta['y']), ambiente.meta['raio'],
+                                linewidth=2, edgecolor='black', facecolor='#FFFF00', alpha=0.8))
+    x, y = zip(*trajetoria)
+    ax.plot(x, y, '-', color='#3333CC', linewidth=1.5)
+    ax.plot(x[0], y[0], 'o', color='#3333CC')
+    ax.plot(x[-1], y[-1], 's', color='#CC3333')
+    fig.savefig(caminho)
+    plt.close(fig)
+    print(f"Gravado: {caminho}")
+
+def comando_reproduzir(configuracao, caminho, id_individuo=None, cenario=None, imagem=None,
+                       saida=None, janela=False):
+    # Reproduz a primeira tentativa do cenário (a mesma de avaliar, que faz a
+    # média de TENTATIVAS) e grava a trajetória
+    individuo = carregar_controlador(caminho, id_individuo)
+    cenario = configuracao['cenario_inicial'] if cenario is None else cenario
+    random.seed(cenario)
     ambiente = Ambiente()
     robo = Robo(ambiente.largura // 2, ambiente.altura // 2)
-    simulador = Simulador(ambiente, robo, melhor_individuo)
+    if janela:
+        Simulador(ambiente, robo, individuo).simular()
+        return 0
+    
+    trajetoria = []
+    fitness, estatisticas = simular_tentativa(individuo, ambiente, robo, SensoresIncrementais(robo, ambiente),
+                                              motor=configuracao['motor'], trajetoria=trajetoria)
+    print(f"Cenário {cenario}, tentativa 1: fitness {fitness:.2f}, {estatisticas['passos']} passos, "
+          f"{estatisticas['recursos_coletados']} recursos, {estatisticas['colisoes']} colisões, "
+          f"meta {'atingida' if estatisticas['meta_atingida'] else 'não atingida'}")
+    if imagem:
+        desenhar_trajetoria(ambiente, trajetoria, imagem)
+    if saida:
+        salvar_json({'controlador': caminho, 'cenario': cenario, 'fitness': fitness,
+                     'estatisticas': estatisticas, 'trajetoria': trajetoria}, saida)
+    return 0
+
+def _opcoes_comuns(parser, destino_definicoes, padrao):
+    parser.add_argument('--config', default=padrao,
+                        help='arquivo JSON com um perfil ou {"perfis": {...}, "perfil": nome}')
+    parser.add_argument('--perfil', default=padrao,
+                        help=f"perfil de configuração (embutidos: {', '.join(PERFIS)})")
+    parser.add_argument('--definir', action='append', dest=destino_definicoes, default=padrao,
+                        metavar='CHAVE=VALOR',
+                        help='sobrescreve uma chave da configuração (valor em JSON); pode repetir')
+    parser.add_argument('--sem-tela', action='store_true', default=padrao,
+                        help='nunca abre janelas (automático quando não há DISPLAY)')
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        description="Robô com programação genética: treino, avaliação, benchmark e reprodução.",
+        epilog="Sem subcomando, treina com o perfil escolhido e abre o simulador (se houver tela).")
+    _opcoes_comuns(parser, 'definicoes', None)
+    parser.set_defaults(definicoes=[], definicoes_comando=[], sem_tela=False)
+    # As mesmas opções depois do subcomando (têm prioridade sobre as de antes)
+    comuns = argparse.ArgumentParser(add_help=False)
+    _opcoes_comuns(comuns, 'definicoes_comando', argparse.SUPPRESS)
+    subparsers = parser.add_subparsers(dest='comando')
+    
+    treinar = subparsers.add_parser('treinar', parents=[comuns],
+                                    help='evolui uma população e grava o melhor indivíduo')
+    treinar.add_argument('--mostrar', action='store_true', help='abre o simulador com o melhor indivíduo')
+    
+    avaliar = subparsers.add_parser('avaliar', parents=[comuns],
+                                    help='avalia um controlador salvo em vários cenários')
+    avaliar.add_argument('controlador', help='indivíduo JSON, checkpoint ou arquivo de população')
+    avaliar.add_argument('--id', type=int, help='id do indivíduo no arquivo de população (padrão: o melhor)')
+    avaliar.add_argument('--cenarios', type=int, help='número de cenários (sobrescreve n_cenarios)')
+    avaliar.add_argument('--saida', help='grava os resultados em JSON')
     
-    print("Executando simulação em tempo real...")
-    print("A simulação será exibida em uma janela separada.")
-    print("Pressione Ctrl+C para fechar a janela quando desejar.")
-    simulador.simular() 
+    benchmark = subparsers.add_parser('benchmark', parents=[comuns],
+                                      help='mede a velocidade de avaliação de cada motor')
+    benchmark.add_argument('--individuos', type=int, default=50)
+    benchmark.add_argument('--saida', help='grava os resultados em JSON')
+    
+    reproduzir = subparsers.add_parser('reproduzir', parents=[comuns],
+                                       help='reproduz um controlador em um cenário')
+    reproduzir.add_argument('controlador', help='indivíduo JSON, checkpoint ou arquivo de população')
+    reproduzir.add_argument('--id', type=int, help='id do indivíduo no arquivo de população (padrão: o melhor)')
+    reproduzir.add_argument('--cenario', type=int, help='semente do ambiente (padrão: cenario_inicial)')
+    reproduzir.add_argument('--imagem', default='reproducao_robo.png', help='imagem da trajetória')
+    reproduzir.add_argument('--saida', help='grava estatísticas e trajetória em JSON')
+    reproduzir.add_argument('--janela', action='store_true', help='abre o simulador em tempo real')
+    
+    trabalhador = subparsers.add_parser('trabalhador', parents=[comuns],
+                                        help='avalia lotes enviados por um coordenador')
+    trabalhador.add_argument('endereco', help='tcp://host:porta ou unix:///caminho')
+    trabalhador.add_argument('--nome')
+    
+    subparsers.add_parser('configuracao', parents=[comuns],
+                          help='mostra a configuração resultante em JSON')
+    return parser
+
+def main(argv=None):
+    parser = criar_parser()
+    args = parser.parse_args(argv)
+    try:
+        configuracao = carregar_configuracao(args.config, args.perfil,
+                                             args.definicoes + args.definicoes_comando)
+    except (OSError, ValueError) as erro:
+        parser.error(str(erro))
+    
+    tela = not args.sem_tela and tem_tela()
+    if not tela:
+        plt.switch_backend('Agg')
+    
+    try:
+        if args.comando in (None, 'treinar'):
+            # Sem subcomando: comportamento original (treinar e mostrar)
+            mostrar = args.comando is None or args.mostrar
+            if mostrar and not tela:
+                print("Sem tela disponível: o simulador não será aberto.")
+            return comando_treinar(configuracao, mostrar and tela)
+        if args.comando == 'avaliar':
+            if args.cenarios is not None:
+                configuracao['n_cenarios'] = args.cenarios
+            return comando_avaliar(configuracao, args.controlador, args.id, args.saida)
+        if args.comando == 'benchmark':
+            return comando_benchmark(configuracao, args.individuos, args.saida)
+        if args.comando == 'reproduzir':
+            if args.janela and not tela:
+                print("Sem tela disponível: gravando apenas a trajetória.")
+            return comando_reproduzir(configuracao, args.controlador, args.id, args.cenario,
+                                      args.imagem, args.saida, args.janela and tela)
+        if args.comando == 'trabalhador':
+            executar_trabalhador(args.endereco, args.nome)
+            return 0
+        print(json.dumps(configuracao, indent=2))
+        return 0
+    except KeyboardInterrupt:
+        print("Interrompido.")
+        return 130
+    except (OSError, KeyError, ValueError) as erro:
+        print(f"Erro: {erro}", file=sys.stderr)
+        return 1
+
+# Executando o algoritmo
+if __name__ == "__main__":
+    sys.exit(main())
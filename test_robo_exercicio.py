@@ -0,0 +1,424 @@
+# Verificações de equivalência das otimizações de robo_exercicio.py
+# Executar com: python -m pytest -q
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import robo_exercicio as r
+
+
+def _iguais(a, b):
+    # Igualdade elemento a elemento, considerando nan igual a nan
+    return len(a) == len(b) and all(x == y or (x != x and y != y) for x, y in zip(a, b))
+
+
+def _populacao(semente, n=40, profundidade=4):
+    random.seed(semente)
+    populacao = []
+    for _ in range(n):
+        individuo = r.IndividuoPG(profundidade)
+        individuo.mutacao(probabilidade=0.5)
+        populacao.append(individuo)
+    return populacao
+
+
+def _passos(individuo, semente, n_passos=300):
+    # Percorre um episódio devolvendo (robo, ambiente, leitor) a cada passo
+    random.seed(semente)
+    ambiente = r.Ambiente()
+    robo = r.Robo(ambiente.largura // 2, ambiente.altura // 2)
+    leitor = r.SensoresIncrementais(robo, ambiente)
+    ambiente.reset()
+    robo.reset(ambiente.largura // 2, ambiente.altura // 2)
+    leitor.reset()
+    for _ in range(n_passos):
+        yield robo, ambiente, leitor
+        sensores = robo.get_sensores(ambiente)
+        aceleracao = individuo.avaliar(sensores, 'aceleracao')
+        rotacao = individuo.avaliar(sensores, 'rotacao')
+        sem_energia = robo.mover(max(-1, min(1, aceleracao)), max(-0.5, min(0.5, rotacao)), ambiente)
+        if sem_energia or ambiente.passo():
+            break
+
+
+def test_sensores_incrementais_iguais_a_get_sensores():
+    for semente, individuo in enumerate(_populacao(1, n=20)):
+        for robo, ambiente, leitor in _passos(individuo, semente):
+            assert leitor.ler() == robo.get_sensores(ambiente)
+
+
+def test_avaliador_compilado_igual_ao_interpretador():
+    for semente, individuo in enumerate(_populacao(2)):
+        for robo, ambiente, leitor in _passos(individuo, semente, n_passos=100):
+            sensores = robo.get_sensores(ambiente)
+            sensores['total_recursos'] = len(ambiente.recursos)
+            esperado = (individuo.avaliar(sensores, 'aceleracao'), individuo.avaliar(sensores, 'rotacao'))
+            assert _iguais(individuo.avaliar_ambas(sensores), esperado)
+
+
+def test_cache_semantico_exato_nao_muda_resultado():
+    cache = r.CacheSemantico(capacidade=1000, passo=None, tamanho_minimo=1)
+    for semente, individuo in enumerate(_populacao(3)):
+        for robo, ambiente, leitor in _passos(individuo, semente, n_passos=100):
+            sensores = robo.get_sensores(ambiente)
+            sensores['total_recursos'] = len(ambiente.recursos)
+            for tipo in ('aceleracao', 'rotacao'):
+                assert _iguais([individuo.avaliar(sensores, tipo, cache)], [individuo.avaliar(sensores, tipo)])
+            assert _iguais(individuo.avaliar_ambas(sensores, cache), individuo.avaliar_ambas(sensores))
+    assert cache.acertos > 0
+
+
+def test_cache_semantico_aproximado_respeita_escala_dos_sensores():
+    cache = r.CacheSemantico(capacidade=1000, passo=0.01, tamanho_minimo=1)
+    individuo = r.IndividuoPG(arvores=({'tipo': 'folha', 'variavel': 'angulo_meta'},
+                                       {'tipo': 'folha', 'variavel': 'dist_meta'}))
+    for angulo in r.np.linspace(-3.1, 3.1, 200):
+        sensores = {'angulo_meta': float(angulo), 'dist_meta': 500.0}
+        esperado = individuo.avaliar(sensores, 'aceleracao')
+        obtido = individuo.avaliar(sensores, 'aceleracao', cache)
+        assert abs(obtido - esperado) <= 0.01
+        if abs(esperado) > 0.01:
+            assert obtido * esperado > 0  # Nunca troca o sinal (antes: +0.95 para -0.95)
+    assert cache.acertos > 0
+    # Contagens e bools nunca são quantizados
+    assert cache.quantizar('recursos_coletados', 3) == 3
+    assert cache.quantizar('meta_atingida', True) is True
+    assert cache.quantizar('dist_meta', 504.0) == cache.quantizar('dist_meta', 496.0)
+    assert cache.quantizar('angulo_meta', -3.0) != cache.quantizar('angulo_meta', 3.0)
+
+
+def test_cache_semantico_libera_nos_a_cada_geracao():
+    random.seed(4)
+    pg = r.ProgramacaoGenetica(tamanho_populacao=8, profundidade=3,
+                               cache_semantico=r.CacheSemantico(capacidade=1000), motor='escalar')
+    pg.evoluir(n_geracoes=2)
+    ids_populacao = {id(no) for i in pg.populacao for no in (i.arvore_aceleracao, i.arvore_rotacao)}
+    pg.avaliar_populacao()
+    assert {id(info[0]) for info in pg.cache_semantico.info_nos.values()} >= ids_populacao
+    assert len(pg.cache_semantico.info_nos) <= sum(i.tamanho() for i in pg.populacao)
+
+
+def test_selecao_torneio_sem_repeticao():
+    rng = r.np.random.default_rng(0)
+    selecao = r.SelecaoTorneio()
+    # Os dois ramos: re-sorteio (torneio pequeno) e permutação (torneio grande)
+    for n_populacao, tamanho in ((14, 14), (12, 10), (12, 6), (50, 5), (6, 3)):
+        torneios = selecao.sortear(n_populacao, 2000, tamanho, rng)
+        assert torneios.shape == (2000, tamanho)
+        assert ((torneios >= 0) & (torneios < n_populacao)).all()
+        ordenados = r.np.sort(torneios, axis=1)
+        assert (ordenados[:, 1:] != ordenados[:, :-1]).all()
+
+
+def test_selecao_torneio_escolhe_o_melhor_do_torneio():
+    fitness = r.np.random.default_rng(1).random(14)
+    selecao = r.SelecaoTorneio(14)
+    # Torneio com a população inteira: sempre vence o melhor
+    assert (selecao.escolher(fitness, 500, r.np.random.default_rng(2)) == fitness.argmax()).all()
+    # Comparação com a referência: mesmo sorteio, vencedor por argmax
+    selecao = r.SelecaoTorneio(4)
+    torneios = selecao.sortear(14, 500, 4, r.np.random.default_rng(3))
+    esperado = [max(linha, key=lambda i: fitness[i]) for linha in torneios]
+    assert list(selecao.escolher(fitness, 500, r.np.random.default_rng(3))) == esperado
+
+
+def test_selecao_torneio_dinamico_e_ranking():
+    dinamico = r.SelecaoTorneioDinamico(minimo=3, maximo=10)
+    tamanhos = [dinamico.tamanho_torneio(g, 10) for g in range(10)]
+    assert tamanhos[0] == 5 and tamanhos[-1] == 9 and tamanhos == sorted(tamanhos)
+    assert dinamico.tamanho_torneio(10, 10) == 10
+
+    fitness = r.np.array([5.0, 1.0, 3.0, 2.0])
+    escolhidos = r.SelecaoRanking().escolher(fitness, 100000, r.np.random.default_rng(4))
+    frequencias = r.np.bincount(escolhidos, minlength=4) / len(escolhidos)
+    # Pesos pelo posto: 4, 1, 3, 2 (de 10)
+    assert r.np.allclose(frequencias, [0.4, 0.1, 0.3, 0.2], atol=0.01)
+
+
+def test_sortear_pares_distintos():
+    random.seed(15)
+    pg = r.ProgramacaoGenetica(tamanho_populacao=4, profundidade=2)
+    pares = list(pg.sortear_pares(5000, 3))
+    assert all(i != j and 0 <= i < 3 and 0 <= j < 3 for i, j in pares)
+    assert len(set(pares)) == 6
+
+
+def test_escolher_pais_distintos_na_geracao_atual():
+    random.seed(16)
+    pg = r.ProgramacaoGenetica(tamanho_populacao=3, profundidade=2, selecao=r.SelecaoRanking())
+    for individuo, fitness in zip(pg.populacao, [3.0, 2.0, 1.0]):
+        individuo.fitness = fitness
+    pares = {tuple(pg.populacao.index(p) for p in pg.escolher_pais()) for _ in range(2000)}
+    assert pares == {(0, 1), (0, 2), (1, 0), (1, 2), (2, 0), (2, 1)}
+
+    chamadas = []
+    pg.selecao = SimpleNamespace(escolher=lambda fitness, n, rng, geracao=0, n_geracoes=1:
+                                 chamadas.append((geracao, n_geracoes)) or r.np.zeros(n, dtype=int))
+    pg.geracao, pg.n_geracoes = 7, 10
+    pai1, pai2 = pg.escolher_pais()
+    assert pai1 is pg.populacao[0] and pai2 is pg.populacao[1]
+    assert chamadas == [(7, 10), (7, 10)]
+
+
+def test_evolucao_assincrona_aplica_parcimonia_e_registra_custo():
+    for reavaliar in (False, True):
+        random.seed(17)
+        pg = r.ProgramacaoGenetica(tamanho_populacao=6, profundidade=2, parcimonia=1e6)
+        pg.evoluir_assincrono(n_avaliacoes=24, n_processos=2, reavaliar=reavaliar)
+        assert len(pg.historico_fitness) == len(pg.historico_tamanho) == 4
+        assert all(h['custo_total'] > 0 for h in pg.historico_tamanho)
+        # Penalidade de pelo menos 2 nós x 1e6, muito acima de qualquer fitness
+        assert all(i.fitness < -1e6 for i in pg.populacao)
+        assert pg.geracao == 3 and pg.n_geracoes == 4
+
+
+def test_limitar_respeita_max_nos():
+    for individuo in _populacao(5, n=20, profundidade=5):
+        individuo.limitar(max_nos=2)
+        assert individuo.tamanho() == 2
+    try:
+        r.ProgramacaoGenetica(tamanho_populacao=2, max_nos=1)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("max_nos=1 deveria ser rejeitado")
+
+
+def test_arquivo_populacao_ida_e_volta(tmp_path):
+    caminho = str(tmp_path / 'populacao.pga')
+    populacao = _populacao(6, n=15, profundidade=5)
+    for posicao, individuo in enumerate(populacao):
+        individuo.fitness = float(posicao)
+    arquivo = r.ArquivoPopulacao(caminho)
+    ids = arquivo.adicionar_populacao(populacao, geracao=3)
+    arquivo.fechar()
+
+    leitura = r.ArquivoPopulacao(caminho, somente_leitura=True)
+    try:
+        for individuo, copia in zip(populacao, leitura.carregar_varios(ids)):
+            assert copia.arvore_aceleracao == individuo.arvore_aceleracao
+            assert copia.arvore_rotacao == individuo.arvore_rotacao
+            assert copia.fitness == individuo.fitness
+        assert list(leitura.melhores(3)) == [ids[-1], ids[-2], ids[-3]]
+        assert list(leitura.filtrar(geracao=3)) == ids
+    finally:
+        leitura.fechar()
+    assert r.IndividuoPG.carregar(caminho, ids[0]).arvore_rotacao == populacao[0].arvore_rotacao
+
+
+def test_arquivo_populacao_leitura_nao_cria_arquivos(tmp_path):
+    caminho = str(tmp_path / 'nao_existe.pga')
+    try:
+        r.IndividuoPG.carregar(caminho, 0)
+    except OSError:
+        pass
+    else:
+        raise AssertionError("carregar deveria falhar para um arquivo inexistente")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_carregar_json_nao_consome_random(tmp_path):
+    caminho = str(tmp_path / 'individuo.json')
+    individuo = _populacao(7, n=1)[0]
+    individuo.salvar(caminho)
+    random.seed(8)
+    copia = r.IndividuoPG.carregar(caminho)
+    assert random.random() == random.Random(8).random()
+    assert (copia.arvore_aceleracao, copia.arvore_rotacao) == (individuo.arvore_aceleracao, individuo.arvore_rotacao)
+
+
+def test_comportamento_vetorizado_proximo_do_escalar():
+    sondas = r.gerar_sondas(32, semente=1)
+    vetorizadas = r.vetorizar_sondas(sondas)
+    for individuo in _populacao(9, n=100, profundidade=5):
+        avaliador = individuo.compilar()
+        esperado = []
+        for sensores in sondas:
+            aceleracao, rotacao = avaliador(sensores)
+            esperado += [max(-1, min(1, aceleracao)), max(-0.5, min(0.5, rotacao))]
+        esperado = r.np.nan_to_num(r.np.array(esperado, dtype=float), nan=0.0)
+        assert r.np.allclose(r.comportamento(individuo, vetorizadas), esperado, rtol=0, atol=1e-3)
+
+
+def test_substituto_tria_com_exploracao_e_registra_elite_uma_vez():
+    populacao = _populacao(10, n=20, profundidade=4)
+    for posicao, individuo in enumerate(populacao):
+        individuo.fitness = float(posicao)
+    substituto = r.ModeloSubstituto(k=3, fracao_exploracao=0.2)
+    substituto.registrar(populacao)
+    assert len(substituto.fitness) == 20
+
+    candidatos = _populacao(11, n=30, profundidade=4)
+    escolhidos = substituto.triar(candidatos, 10)
+    assert len(escolhidos) == 10 and len({id(c) for c in escolhidos}) == 10
+    previstos = substituto.prever(r.np.array([r.comportamento(c, substituto.sondas) for c in candidatos]))
+    melhores = {id(candidatos[i]) for i in r.np.argsort(-previstos)[:8]}
+    # 8 pela previsão e 2 (20%) sorteados entre os demais
+    assert melhores <= {id(c) for c in escolhidos}
+    assert len({id(c) for c in escolhidos} - melhores) == 2
+
+    # Próxima geração: a elite (populacao[-1]) continua e não entra de novo no treino
+    proxima = [populacao[-1]] + escolhidos[:9]
+    for individuo in proxima[1:]:
+        individuo.fitness = 1.0
+    substituto.registrar(proxima)
+    assert len(substituto.fitness) == 29
+
+
+def _estado(x=400.0, y=300.0, colisoes=0, tempo=0):
+    # Robô e ambiente mínimos para as regras de parada
+    robo = SimpleNamespace(x=x, y=y, raio=15, recursos_coletados=0, meta_atingida=False,
+                           distancia_percorrida=0.0, colisoes=colisoes)
+    ambiente = SimpleNamespace(tempo=tempo, max_tempo=1000, meta={'x': 700, 'y': 500, 'raio': 30},
+                               recursos=[{'x': 100 * i, 'y': 100, 'coletado': False} for i in range(1, 6)])
+    return robo, ambiente
+
+
+def _disparos(regra, passos):
+    # passos: lista de (x, y, colidiu); retorna os tempos em que a regra disparou
+    robo, ambiente = _estado()
+    politica = r.PoliticaParada([regra])
+    politica.iniciar_tentativa(robo, ambiente, {})
+    tempos = []
+    for tempo, (x, y, colidiu) in enumerate(passos, start=1):
+        robo.x, robo.y, ambiente.tempo = x, y, tempo
+        if politica.verificar(robo, ambiente, colidiu) is not None:
+            tempos.append(tempo)
+    return tempos
+
+
+def test_regra_ciclos_colisao():
+    presa = [(400, 300, True)] * 12
+    assert _disparos(r.RegraCiclosColisao(janela=10, fracao=0.6), presa)[0] == 10
+    alternada = [(400, 300, t % 2 == 0) for t in range(40)]
+    assert _disparos(r.RegraCiclosColisao(janela=10, fracao=0.6), alternada) == []
+    assert _disparos(r.RegraCiclosColisao(janela=10, fracao=0.6, ativa=False), presa) == []
+
+
+def test_regra_estagnacao():
+    circulo = [(400 + 5 * r.np.cos(t), 300 + 5 * r.np.sin(t), False) for t in range(40)]
+    assert _disparos(r.RegraEstagnacao(janela=20, lado_minimo=30, intervalo=10), circulo)[0] == 20
+    reta = [(100 + 3 * t, 300, False) for t in range(40)]
+    assert _disparos(r.RegraEstagnacao(janela=20, lado_minimo=30, intervalo=10), reta) == []
+    assert _disparos(r.RegraEstagnacao(janela=20, lado_minimo=30, intervalo=10, ativa=False), circulo) == []
+
+
+def test_regra_limite_fitness():
+    regra = r.RegraLimiteFitness(intervalo=1)
+    robo, ambiente = _estado(colisoes=250, tempo=500)
+    # Quatro tentativas novas ainda podem passar de 3000
+    regra.limiar = 3000
+    regra.iniciar(robo, ambiente, {'fitness_acumulado': 0, 'tentativas_restantes': 4})
+    assert not regra.verificar(robo, ambiente, False)
+    # Última tentativa, sem fitness acumulado: não alcança 5000 de média
+    regra.limiar = 5000
+    regra.iniciar(robo, ambiente, {'fitness_acumulado': 0, 'tentativas_restantes': 0})
+    assert regra.verificar(robo, ambiente, False)
+    # Sem limiar (primeira geração) nunca dispara
+    regra.limiar = None
+    assert not regra.verificar(robo, ambiente, False)
+    assert not r.PoliticaParada().regra('limite_fitness').ativa
+
+
+def test_passos_economizados_sao_limite_inferior():
+    random.seed(13)
+    ambiente = r.Ambiente()
+    robo = r.Robo(ambiente.largura // 2, ambiente.altura // 2)
+    leitor = r.SensoresIncrementais(robo, ambiente)
+    politica = r.PoliticaParada()
+    disparos = 0
+    for semente, individuo in enumerate(_populacao(14, n=60)):
+        random.seed(semente)
+        _, sem_regras = r.simular_tentativa(individuo, ambiente, robo, leitor)
+        politica.zerar_estatisticas()
+        random.seed(semente)
+        _, com_regras = r.simular_tentativa(individuo, ambiente, robo, leitor, politica=politica)
+        economizados = sum(e['passos_economizados'] for e in politica.estatisticas().values())
+        assert sem_regras['passos'] - com_regras['passos'] >= economizados
+        disparos += com_regras['regra_parada'] is not None
+    assert disparos > 0
+
+
+def test_sementes_de_arquivo_nao_herdam_linhagem(tmp_path):
+    origem = str(tmp_path / 'origem.pga')
+    populacao = _populacao(16, n=2, profundidade=3)  # 4 vagas: 2 sementes e 2 cópias
+    for posicao, individuo in enumerate(populacao):
+        individuo.fitness = float(posicao)
+        individuo.pais = (posicao + 100, posicao + 200)
+    arquivo = r.ArquivoPopulacao(origem)
+    arquivo.adicionar_populacao(populacao)
+    arquivo.fechar()
+
+    random.seed(17)
+    destino = r.ArquivoPopulacao(str(tmp_path / 'destino.pga'))
+    pg = r.ProgramacaoGenetica(tamanho_populacao=8, profundidade=3, sementes=[origem], fracao_sementes=0.5,
+                               arquivo_populacao=destino)
+    assert all(i.id is None and i.pais == () for i in pg.populacao)
+    pg.evoluir(n_geracoes=1)
+    indice = destino.indice()
+    assert (indice['pai1'][:8] == -1).all() and (indice['pai2'][:8] == -1).all()
+    destino.fechar()
+
+
+def _trabalhador(endereco, nome):
+    codigo = f"import robo_exercicio as r; r.executar_trabalhador({endereco!r}, {nome!r}, intervalo_batimento=0.2)"
+    return subprocess.Popen([sys.executable, '-c', codigo], cwd=os.path.dirname(os.path.abspath(r.__file__)))
+
+
+def _esperar(condicao, limite=30.0):
+    fim = time.monotonic() + limite
+    while not condicao():
+        assert time.monotonic() < fim
+        time.sleep(0.005)
+
+
+def test_coordenador_redespacha_lote_de_trabalhador_parado(tmp_path):
+    random.seed(18)
+    itens = [((i.arvore_aceleracao, i.arvore_rotacao), 7) for i in _populacao(18, n=10, profundidade=3)]
+    endereco = f"unix://{tmp_path / 'coordenador.sock'}"
+    coordenador = r.Coordenador(endereco, tamanho_lote=2, tempo_limite=1.0, tempo_espera=30.0)
+    processos = [_trabalhador(endereco, 'parado')]
+    try:
+        _esperar(lambda: 'parado' in coordenador.trabalhadores)
+        saida = {}
+        avaliacao = threading.Thread(target=lambda: saida.update(resultados=coordenador.avaliar(itens)))
+        avaliacao.start()
+        # Congela o trabalhador com um lote em mãos: sem batimentos, o lote
+        # volta para a fila depois de tempo_limite
+        _esperar(lambda: 0 < len(coordenador.fila) < len(itens))
+        os.kill(processos[0].pid, signal.SIGSTOP)
+        processos += [_trabalhador(endereco, 'trabalhador1'), _trabalhador(endereco, 'trabalhador2')]
+        avaliacao.join(120)
+        assert not avaliacao.is_alive()
+    finally:
+        processos[0].kill()
+        coordenador.fechar()
+        for processo in processos[1:]:
+            try:
+                processo.wait(10)
+            except subprocess.TimeoutExpired:
+                processo.kill()
+
+    assert coordenador.redespachadas > 0
+    assert 'parado' not in coordenador.trabalhadores
+    esperado = [r.avaliar_arvores(arvores, cenario)[:2] for arvores, cenario in itens]
+    assert [list(resultado) for resultado in saida['resultados']] == json.loads(json.dumps(esperado))
+
+
+def test_coordenador_sem_trabalhadores_desiste(tmp_path):
+    coordenador = r.Coordenador(f"unix://{tmp_path / 'coordenador.sock'}", tempo_espera=0.3)
+    try:
+        individuo = _populacao(19, n=1, profundidade=2)[0]
+        with pytest.raises(TimeoutError):
+            coordenador.avaliar([((individuo.arvore_aceleracao, individuo.arvore_rotacao), 0)])
+        assert not coordenador.tarefas and not coordenador.fila
+    finally:
+        coordenador.fechar()